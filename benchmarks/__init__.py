@@ -0,0 +1 @@
+"""Offline benchmarks for the Min Renovasjon integration."""
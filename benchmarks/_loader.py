@@ -0,0 +1,9 @@
+"""Import the integration's modules for the benchmarks."""
+from __future__ import annotations
+
+from integration_loader import PACKAGE_DIR, loader
+
+__all__ = ["PACKAGE_DIR", "load"]
+
+# run and startup share one package, so their modules are loaded once
+load = loader("min_renovasjon_bench")
@@ -0,0 +1,76 @@
+"""Recorded and synthetic API payloads for the benchmarks."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+import json
+from pathlib import Path
+from typing import Any
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+ICON_URL = "http://komteksky.norkart.no/MinRenovasjon.Api/Content/Images/Fraksjon/{}.png"
+
+
+def recorded(name: str) -> Any:
+    """Return a recorded payload: `fraksjoner`, `tommekalender` or `adresser`."""
+    with open(FIXTURES / f"{name}.json", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def synthetic_fraksjoner(fractions: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "Id": fraction_id,
+            "Navn": f"Fraksjon {fraction_id}",
+            "Ikon": ICON_URL.format(fraction_id),
+            "NorkartStandardFraksjonId": fraction_id,
+        }
+        for fraction_id in range(1, fractions + 1)
+    ]
+
+
+def synthetic_tommekalender(
+    fractions: int, dates: int, start: date = date(2026, 1, 5)
+) -> list[dict[str, Any]]:
+    """Return a calendar with `dates` pickups for each of `fractions` fractions.
+
+    Fractions cycle through 1, 2 and 4 week intervals and share days, like
+    real schedules do.
+    """
+    calendar = []
+    for fraction_id in range(1, fractions + 1):
+        interval = timedelta(weeks=(1, 2, 4)[fraction_id % 3])
+        first = start + timedelta(days=fraction_id % 5)
+        calendar.append({
+            "FraksjonId": fraction_id,
+            "Tommedatoer": [
+                (first + interval * index).strftime("%Y-%m-%dT00:00:00")
+                for index in range(dates)
+            ],
+        })
+    return calendar
+
+
+def _street_name(street: int) -> str:
+    letters = ""
+    while street:
+        street, rest = divmod(street, 26)
+        letters += "abcdefghijklmnopqrstuvwxyz"[rest]
+    return f"{letters.capitalize()}veien"
+
+
+def synthetic_address_rows(streets: int, numbers: int) -> list[tuple[str, ...]]:
+    """Return address index rows for `streets` streets with `numbers` houses each."""
+    return [
+        (
+            _street_name(street),
+            str(number),
+            f"{3000 + street % 900:04d}",
+            f"POSTSTED {street % 50}",
+            f"{3800 + street % 20}",
+            f"KOMMUNE {street % 20}",
+            str(10000 + street),
+            f"{_street_name(street)} {number}",
+        )
+        for street in range(1, streets + 1)
+        for number in range(1, numbers + 1)
+    ]
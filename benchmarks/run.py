@@ -0,0 +1,471 @@
+"""Run the offline benchmark suite and write the results as JSON.
+
+Usage, from the repository root:
+
+    python -m benchmarks.run --output bench.json
+
+Everything is served by a local stand-in for the Norkart proxy and
+Geonorge, so no network access is needed. Benchmarks that need Home
+Assistant are reported as skipped when it is not installed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta, timezone
+import gc
+import json
+from pathlib import Path
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+from . import payloads
+from ._loader import PACKAGE_DIR, load
+from .server import StandInServer
+
+LARGE_FRACTIONS = 300
+LARGE_DATES = 104
+BATCH_LATENCY = 0.02
+ADDRESS_STREETS = 20000
+ADDRESS_NUMBERS = 25
+ADDRESS_QUERIES = 200
+HISTORY_FRACTIONS = 10
+HISTORY_YEARS = 10
+
+
+class Results:
+    """Collect benchmark results in a machine-readable form."""
+
+    def __init__(self) -> None:
+        self.results: list[dict[str, Any]] = []
+
+    def add(self, name: str, samples: list[float], unit: str = "s", **params: Any) -> None:
+        ordered = sorted(samples)
+        self.results.append({
+            "name": name,
+            "unit": unit,
+            "samples": len(samples),
+            "mean": statistics.fmean(samples),
+            "median": statistics.median(samples),
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "min": ordered[0],
+            "max": ordered[-1],
+            "params": params,
+        })
+
+    def add_value(self, name: str, value: float, unit: str, **params: Any) -> None:
+        self.results.append({"name": name, "unit": unit, "value": value, "params": params})
+
+    def skip(self, name: str, reason: str) -> None:
+        self.results.append({"name": name, "skipped": reason})
+
+
+async def sample(func: Callable[[], Awaitable[Any]], iterations: int, warmup: int = 2) -> list[float]:
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def make_client(api_module, session, catalogue=None, address: int = 0, scheduler=None):
+    return api_module.MinRenovasjon(
+        session, "Storgata", str(14250 + address), "1", "3805", "%d/%m/%Y", catalogue, scheduler
+    )
+
+
+def stub_fetch(client, fraksjoner, tommekalender) -> None:
+    """Serve both endpoints from memory so only parsing is measured."""
+
+    async def _get_from_web_api(url):
+        return fraksjoner if "fraksjoner" in url else tommekalender
+
+    client._get_from_web_api = _get_from_web_api
+
+
+async def bench_refresh_latency(results, api_module, session, server, iterations) -> None:
+    for label, fraksjoner, tommekalender in (
+        ("recorded", payloads.recorded("fraksjoner"), payloads.recorded("tommekalender")),
+        (
+            "large",
+            payloads.synthetic_fraksjoner(LARGE_FRACTIONS),
+            payloads.synthetic_tommekalender(LARGE_FRACTIONS, LARGE_DATES),
+        ),
+    ):
+        server.set_payload("fraksjoner", fraksjoner)
+        server.set_payload("tommekalender", tommekalender)
+        client = make_client(api_module, session)
+        results.add(
+            "refresh_calendar_latency",
+            await sample(client.refresh_calendar, iterations),
+            payload=label,
+        )
+
+
+async def bench_parse_throughput(results, api_module, iterations) -> None:
+    parse = load("parse")
+    fraksjoner = payloads.synthetic_fraksjoner(LARGE_FRACTIONS)
+    tommekalender = payloads.synthetic_tommekalender(LARGE_FRACTIONS, LARGE_DATES)
+
+    body = json.dumps(tommekalender).encode()
+
+    async def decode():
+        parse.decode_json(body)
+
+    async def decode_stdlib():
+        json.loads(body)
+
+    results.add("decode_calendar", await sample(decode, iterations), backend=parse.JSON_BACKEND, bytes=len(body))
+    results.add("decode_calendar", await sample(decode_stdlib, iterations), backend="json", bytes=len(body))
+
+    client = make_client(api_module, None)
+    stub_fetch(client, fraksjoner, tommekalender)
+    parse.parse_pickup_date.cache_clear()
+    samples = await sample(client._get_calendar_list, iterations)
+    results.add("parse_calendar", samples, fractions=LARGE_FRACTIONS, dates=LARGE_DATES)
+    results.add_value(
+        "parse_calendar_throughput",
+        LARGE_FRACTIONS * LARGE_DATES / statistics.median(samples),
+        "dates/s",
+        fractions=LARGE_FRACTIONS,
+        dates=LARGE_DATES,
+    )
+
+
+async def bench_ics_feed(results, api_module, iterations) -> None:
+    ics = load("ics")
+    schedule = load("schedule")
+    client = make_client(api_module, None)
+    stub_fetch(
+        client,
+        payloads.synthetic_fraksjoner(LARGE_FRACTIONS),
+        payloads.synthetic_tommekalender(LARGE_FRACTIONS, LARGE_DATES),
+    )
+    timeline = schedule.CollectionTimeline(await client._get_calendar_list())
+
+    async def render():
+        ics.render_ics(timeline, "Bench", "bench")
+
+    results.add("ics_render", await sample(render, iterations), pickups=len(timeline))
+
+    # What an update with an unchanged schedule costs: the digest only
+    feed = ics.render_ics(timeline, "Bench", "bench")
+
+    async def unchanged():
+        ics.render_ics(timeline, "Bench", "bench", feed)
+
+    results.add("ics_unchanged", await sample(unchanged, iterations), pickups=len(timeline))
+
+
+async def bench_history(results, api_module, iterations) -> None:
+    try:
+        from homeassistant.core import HomeAssistant
+
+        history_module = load("history")
+    except ImportError as err:
+        for name in ("history_record", "history_statistics", "history_pickups"):
+            results.skip(name, f"Home Assistant not available: {err}")
+        return
+
+    schedule = load("schedule")
+    client = make_client(api_module, None)
+    stub_fetch(
+        client,
+        payloads.synthetic_fraksjoner(HISTORY_FRACTIONS),
+        payloads.synthetic_tommekalender(
+            HISTORY_FRACTIONS, HISTORY_YEARS * 52, start=date(2016, 1, 4)
+        ),
+    )
+    timeline = schedule.CollectionTimeline(await client._get_calendar_list())
+    # The delayed save must not write into the working directory
+    config_dir = tempfile.TemporaryDirectory()
+    hass = HomeAssistant(config_dir.name)
+    history = history_module.PickupHistory(hass, "bench")
+
+    # Record as if every pickup had passed
+    async def record_new():
+        history._fractions = {}
+        history.async_record(timeline, date.max)
+
+    results.add("history_record", await sample(record_new, iterations), pickups=len(timeline), new=True)
+
+    # Every refresh records the timeline again; known pickups are skipped
+    async def record_known():
+        history.async_record(timeline, date.max)
+
+    results.add("history_record", await sample(record_known, iterations), pickups=len(timeline), new=False)
+
+    async def statistics_year():
+        history.statistics(date(2020, 1, 1), date(2020, 12, 31))
+
+    results.add("history_statistics", await sample(statistics_year, iterations), history=len(history), range_days=366)
+
+    async def pickups_month():
+        history.pickups(date(2020, 6, 1), date(2020, 6, 30))
+
+    results.add("history_pickups", await sample(pickups_month, iterations * 10), history=len(history), range_days=30)
+    await hass.async_stop(force=True)
+    config_dir.cleanup()
+
+
+async def bench_memory(results, api_module, entries) -> None:
+    schedule = load("schedule")
+    views = load("views")
+    fraksjoner = payloads.recorded("fraksjoner")
+    tommekalender = payloads.synthetic_tommekalender(len(fraksjoner), 26)
+    for fraction, entry in zip(fraksjoner, tommekalender):
+        entry["FraksjonId"] = fraction["Id"]
+
+    catalogue = api_module.FractionCatalogue()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = []
+    today = datetime.now().date()
+    for address in range(entries):
+        client = make_client(api_module, None, catalogue, address)
+        stub_fetch(client, fraksjoner, tommekalender)
+        await client.refresh_calendar()
+        kept.append((
+            client,
+            schedule.CollectionTimeline(client.calender_list),
+            [views.build_fraction_view(client, entry, today) for entry in client.calender_list],
+        ))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    results.add_value(
+        "memory_per_entry", (after - before) / entries, "bytes", entries=entries, dates=26
+    )
+
+
+async def bench_address_search(results, session, server, iterations) -> None:
+    address = load("address")
+    address.GEONORGE_API_URL = server.rewrite(address.GEONORGE_API_URL)
+
+    rows = payloads.synthetic_address_rows(ADDRESS_STREETS, ADDRESS_NUMBERS)
+    started = time.perf_counter()
+    index = address.AddressIndex(rows)
+    results.add_value(
+        "address_index_build", time.perf_counter() - started, "s", addresses=len(index)
+    )
+
+    queries = [
+        f"{row[0]} {row[1]} {row[3]}" for row in rows[::len(rows) // ADDRESS_QUERIES]
+    ]
+
+    async def lookup():
+        for query in queries:
+            index.search(query)
+
+    results.add(
+        "address_index_lookup", await sample(lookup, iterations), addresses=len(index),
+        queries=len(queries),
+    )
+
+    async def geonorge():
+        await address.search_geonorge(session, "Storgata 1")
+
+    results.add("address_geonorge", await sample(geonorge, iterations))
+
+    resolver = address.AddressResolver()
+
+    async def cached():
+        await resolver.search(session, "Storgata 1")
+
+    results.add("address_cached", await sample(cached, iterations * 10))
+
+
+async def bench_coordinator(results, api_module, session, server, entries, iterations) -> None:
+    try:
+        from homeassistant.core import HomeAssistant
+
+        coordinator_module = load("coordinator")
+        sensor_module = load("sensor")
+        scheduler_module = load("request_scheduler")
+        const = load("const")
+        calendar_module = load("calendar")
+    except ImportError as err:
+        for name in (
+            "coordinator_refresh",
+            "batch_refresh",
+            "sensor_property_read",
+            "calendar_get_events",
+        ):
+            results.skip(name, f"Home Assistant not available: {err}")
+        return
+
+    server.set_payload("fraksjoner", payloads.recorded("fraksjoner"))
+    server.set_payload("tommekalender", payloads.recorded("tommekalender"))
+    hass = HomeAssistant(str(Path.cwd()))
+    catalogue = api_module.FractionCatalogue()
+    coordinators = []
+    for address in range(entries):
+        coordinator = coordinator_module.MinRenovasjonCoordinator(
+            hass, make_client(api_module, session, catalogue, address)
+        )
+        coordinator.config_entry = SimpleNamespace(entry_id=f"bench-{address}")
+        coordinators.append(coordinator)
+
+    async def refresh_all():
+        for coordinator, data in zip(
+            coordinators,
+            await asyncio.gather(*(c._async_update_data() for c in coordinators)),
+        ):
+            coordinator.data = data
+
+    # Tracing off must cost nothing; on, it shows what sampled spans add
+    for tracing in (False, True):
+        for coordinator in coordinators:
+            coordinator.tracer.configure(tracing)
+        results.add(
+            "coordinator_refresh",
+            await sample(refresh_all, iterations),
+            entries=entries,
+            tracing=tracing,
+        )
+    for coordinator in coordinators:
+        coordinator.tracer.configure(False)
+
+    def make_batch(concurrency, scheduler=None):
+        return coordinator_module.MinRenovasjonBatchCoordinator(
+            hass,
+            [
+                coordinator_module.MinRenovasjonCoordinator(
+                    hass,
+                    make_client(api_module, session, catalogue, address, scheduler),
+                    None,
+                    address_key=str(address),
+                    address_name=str(address),
+                )
+                for address in range(entries)
+            ],
+            concurrency=concurrency,
+        )
+
+    # Without the shared scheduler, batch refresh time follows the concurrency
+    # limit, not the address count
+    server.latency = BATCH_LATENCY
+    for concurrency in (1, 4, 16):
+        results.add(
+            "batch_refresh",
+            await sample(make_batch(concurrency)._async_update_data, max(1, iterations // 5), warmup=0),
+            entries=entries,
+            concurrency=concurrency,
+            latency=BATCH_LATENCY,
+            rate_limited=False,
+        )
+
+    # In production every request goes through the process-wide token bucket,
+    # which bounds a large batch regardless of concurrency. Each sample starts
+    # with a full bucket, like a daily refresh after an idle night.
+    async def scheduled_refresh():
+        scheduler = scheduler_module.RequestScheduler(const.REQUEST_RATE, const.REQUEST_BURST)
+        await make_batch(const.DEFAULT_BATCH_CONCURRENCY, scheduler)._async_update_data()
+
+    results.add(
+        "batch_refresh",
+        await sample(scheduled_refresh, max(1, iterations // 10), warmup=0),
+        entries=entries,
+        concurrency=const.DEFAULT_BATCH_CONCURRENCY,
+        latency=BATCH_LATENCY,
+        rate_limited=True,
+        rate=const.REQUEST_RATE,
+        burst=const.REQUEST_BURST,
+    )
+    server.latency = 0.0
+
+    coordinator = coordinators[0]
+    sensors = [
+        sensor_module.MinRenovasjonSensor(coordinator, fraction_id)
+        for fraction_id in coordinator.fractions
+    ]
+    sensors.append(sensor_module.MinRenovasjonNextCollectionSensor(coordinator))
+
+    async def read_sensors():
+        for sensor in sensors:
+            sensor.state
+            sensor.extra_state_attributes
+            sensor.entity_picture
+
+    results.add("sensor_property_read", await sample(read_sensors, iterations * 10), sensors=len(sensors))
+
+    calendar = calendar_module.MinRenovasjonCalendar(coordinator)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    async def get_events():
+        await calendar.async_get_events(hass, start, start + timedelta(days=365))
+
+    results.add("calendar_get_events", await sample(get_events, iterations * 10), range_days=365)
+    await hass.async_stop(force=True)
+
+
+async def run(args) -> dict[str, Any]:
+    api_module = load("min_renovasjon")
+    results = Results()
+    server = StandInServer(
+        payloads.recorded("fraksjoner"),
+        payloads.recorded("tommekalender"),
+        payloads.recorded("adresser"),
+    )
+    await server.start()
+    api_module.CONST_URL_FRAKSJONER = server.rewrite(api_module.CONST_URL_FRAKSJONER)
+    api_module.CONST_URL_TOMMEKALENDER = server.rewrite(api_module.CONST_URL_TOMMEKALENDER)
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            await bench_refresh_latency(results, api_module, session, server, args.iterations)
+            await bench_parse_throughput(results, api_module, args.iterations)
+            await bench_ics_feed(results, api_module, args.iterations)
+            await bench_history(results, api_module, args.iterations)
+            await bench_memory(results, api_module, args.entries)
+            await bench_address_search(results, session, server, args.iterations)
+            await bench_coordinator(
+                results, api_module, session, server, args.entries, args.iterations
+            )
+    finally:
+        await server.stop()
+
+    with open(PACKAGE_DIR / "manifest.json", encoding="utf-8") as file:
+        version = json.load(file)["version"]
+    return {
+        "meta": {
+            "version": version,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "iterations": args.iterations,
+            "entries": args.entries,
+        },
+        "results": results.results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", "-o", help="write JSON here instead of stdout")
+    parser.add_argument("--iterations", "-n", type=int, default=20)
+    parser.add_argument("--entries", type=int, default=50)
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
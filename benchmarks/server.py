@@ -0,0 +1,75 @@
+"""Local stand-in for the Norkart proxy and the Geonorge address API."""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+from aiohttp import web
+
+NORKART_PROXY = "https://norkartrenovasjon.azurewebsites.net"
+GEONORGE = "https://ws.geonorge.no"
+
+
+class StandInServer:
+    """Serve fixed payloads on the same paths as the real services.
+
+    Requests to the proxy are routed on the upstream path in its `server`
+    query parameter, so clients only need their host swapped for
+    `base_url`.
+    """
+
+    def __init__(self, fraksjoner: Any, tommekalender: Any, adresser: Any) -> None:
+        self._bodies = {
+            "fraksjoner": json.dumps(fraksjoner).encode(),
+            "tommekalender": json.dumps(tommekalender).encode(),
+            "adresser": json.dumps(adresser).encode(),
+        }
+        self.requests = 0
+        # Simulated upstream latency in seconds, applied to every request
+        self.latency = 0.0
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    def set_payload(self, name: str, payload: Any) -> None:
+        self._bodies[name] = json.dumps(payload).encode()
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/proxyserver.ashx", self._proxy)
+        app.router.add_get("/adresser/v1/sok", self._adresser)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def rewrite(self, url: str) -> str:
+        """Point a production URL at this server."""
+        return url.replace(NORKART_PROXY, self.base_url).replace(GEONORGE, self.base_url)
+
+    async def _respond(self, request: web.Request, name: str) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = web.Response(body=self._bodies[name], content_type="application/json")
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response.enable_compression()
+        return response
+
+    async def _proxy(self, request: web.Request) -> web.Response:
+        upstream = request.query.get("server", "")
+        if "/api/fraksjoner" in upstream:
+            return await self._respond(request, "fraksjoner")
+        if "/api/tommekalender" in upstream:
+            return await self._respond(request, "tommekalender")
+        raise web.HTTPNotFound()
+
+    async def _adresser(self, request: web.Request) -> web.Response:
+        return await self._respond(request, "adresser")
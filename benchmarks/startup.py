@@ -0,0 +1,198 @@
+"""Measure the integration's share of Home Assistant import and setup time.
+
+Usage, from the repository root:
+
+    python -m benchmarks.startup --output startup.json
+
+Each import measurement runs in a fresh interpreter. The modules Home
+Assistant has already loaded by the time it sets up an integration are
+imported first, so only what this integration adds is counted. Setup is
+timed against the local API stand-in, both for a first refresh and for a
+restart served from the stored snapshot.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from . import payloads
+from ._loader import PACKAGE_DIR, load
+from .run import make_client
+from .server import StandInServer
+
+ROOT = PACKAGE_DIR.parent.parent
+PACKAGE = "custom_components.min_renovasjon"
+
+# Loaded by Home Assistant before any config entry is set up
+BASELINE = (
+    "aiohttp",
+    "voluptuous",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.http",
+)
+
+# What is imported on setup, and what only when a platform or flow needs it
+TARGETS = {
+    "setup": (PACKAGE,),
+    "platforms": (f"{PACKAGE}.sensor", f"{PACKAGE}.calendar"),
+    "config_flow": (f"{PACKAGE}.config_flow",),
+    "diagnostics": (f"{PACKAGE}.diagnostics",),
+}
+
+
+def measure_import(modules: tuple[str, ...], after: tuple[str, ...] = ()) -> dict[str, Any]:
+    """Import `modules` in a fresh interpreter after BASELINE and `after`."""
+    code = "\n".join(
+        [
+            *(f"import {module}" for module in BASELINE + after),
+            "import sys, time",
+            "loaded = set(sys.modules)",
+            "started = time.perf_counter()",
+            *(f"import {module}" for module in modules),
+            "elapsed = time.perf_counter() - started",
+            "print(elapsed, len(set(sys.modules) - loaded))",
+            "print(*sorted(set(sys.modules) - loaded), sep='\\n', file=sys.stderr)",
+        ]
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, count = result.stdout.split()
+    new_modules = result.stderr.split()
+    return {
+        "seconds": float(elapsed),
+        "modules": int(count),
+        "external": sorted(
+            module for module in new_modules
+            if not module.startswith(PACKAGE) and "." not in module
+        ),
+    }
+
+
+def bench_imports(results: list[dict[str, Any]], repeat: int) -> None:
+    for name, modules in TARGETS.items():
+        after = TARGETS["setup"] if name != "setup" else ()
+        samples = [measure_import(modules, after) for _ in range(repeat)]
+        results.append({
+            "name": f"import_{name}",
+            "unit": "s",
+            "samples": repeat,
+            "median": statistics.median(sample["seconds"] for sample in samples),
+            "min": min(sample["seconds"] for sample in samples),
+            "modules": samples[0]["modules"],
+            "external": samples[0]["external"],
+        })
+
+
+async def bench_setup(results: list[dict[str, Any]], repeat: int) -> None:
+    from homeassistant.core import HomeAssistant
+
+    api_module = load("min_renovasjon")
+    coordinator_module = load("coordinator")
+    snapshot_module = load("snapshot")
+    server = StandInServer(
+        payloads.recorded("fraksjoner"),
+        payloads.recorded("tommekalender"),
+        payloads.recorded("adresser"),
+    )
+    await server.start()
+    api_module.CONST_URL_FRAKSJONER = server.rewrite(api_module.CONST_URL_FRAKSJONER)
+    api_module.CONST_URL_TOMMEKALENDER = server.rewrite(api_module.CONST_URL_TOMMEKALENDER)
+
+    import aiohttp
+
+    cold, warm = [], []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        async with aiohttp.ClientSession() as session:
+            for attempt in range(repeat):
+                entry = SimpleNamespace(entry_id=f"startup-{attempt}", pref_disable_polling=True)
+
+                def create():
+                    coordinator = coordinator_module.MinRenovasjonCoordinator(
+                        hass,
+                        make_client(api_module, session),
+                        24,
+                        snapshot_module.CalendarSnapshotStore(hass, entry.entry_id),
+                    )
+                    coordinator.config_entry = entry
+                    return coordinator
+
+                # Setting up a new entry: nothing stored, so the first refresh blocks
+                started = time.perf_counter()
+                coordinator = create()
+                await coordinator.async_refresh()
+                cold.append(time.perf_counter() - started)
+                await coordinator._snapshot._store._async_handle_write_data()
+
+                # Restarting: the calendar is restored from the snapshot
+                started = time.perf_counter()
+                restored = await create().async_restore_snapshot()
+                warm.append(time.perf_counter() - started)
+                assert restored
+        await hass.async_stop(force=True)
+    await server.stop()
+
+    for name, samples in (("setup_first_refresh", cold), ("setup_from_snapshot", warm)):
+        results.append({
+            "name": name,
+            "unit": "s",
+            "samples": len(samples),
+            "median": statistics.median(samples),
+            "min": min(samples),
+        })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", "-o", help="write JSON here instead of stdout")
+    parser.add_argument("--repeat", "-n", type=int, default=5)
+    args = parser.parse_args()
+
+    results: list[dict[str, Any]] = []
+    bench_imports(results, args.repeat)
+    try:
+        asyncio.run(bench_setup(results, args.repeat))
+    except ImportError as err:
+        for name in ("setup_first_refresh", "setup_from_snapshot"):
+            results.append({"name": name, "skipped": f"Home Assistant not available: {err}"})
+
+    report = json.dumps(
+        {
+            "meta": {
+                "python": sys.version.split()[0],
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Command line tools for the Min Renovasjon integration that run without Home Assistant."""
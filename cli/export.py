@@ -0,0 +1,246 @@
+"""Export pickup schedules for many addresses as NDJSON, without Home Assistant.
+
+Usage, from the repository root:
+
+    python -m cli.export addresses.txt --output schedules.ndjson
+    cat addresses.txt | python -m cli.export - > schedules.ndjson
+
+Each input line is either a free-text address, which is looked up like the
+config flow does ("Storgata 1 Larvik"), or a JSON object with `street_name`,
+`address_code`, `house_number` and `municipality_id`. Each result is written
+as one JSON line as soon as it is ready. With --resume, inputs that already
+have a successful line in the output file are skipped and new lines are
+appended.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+import contextlib
+import json
+import logging
+import sys
+import time
+from typing import IO, Any
+
+import aiohttp
+
+from integration_loader import loader
+
+load = loader("min_renovasjon_cli")
+address = load("address")
+api_module = load("min_renovasjon")
+const = load("const")
+request_scheduler = load("request_scheduler")
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+
+
+def completed_inputs(path: str) -> set[str]:
+    """Return the inputs that already have a successful line in `path`."""
+    done = set()
+    try:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    result = json.loads(line)
+                except ValueError:  # A line cut off by the interruption
+                    continue
+                if isinstance(result, dict) and "error" not in result:
+                    done.add(result.get("input"))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _ends_mid_line(path: str) -> bool:
+    try:
+        with open(path, "rb") as file:
+            if not file.seek(0, 2):
+                return False
+            file.seek(-1, 2)
+            return file.read(1) != b"\n"
+    except FileNotFoundError:
+        return False
+
+
+def _open_output(path: str, resume: bool) -> IO[str]:
+    if not resume:
+        return open(path, "w", encoding="utf-8")
+    # Start on a fresh line if the last run stopped mid-line
+    mid_line = _ends_mid_line(path)
+    file = open(path, "a", encoding="utf-8")
+    if mid_line:
+        file.write("\n")
+    return file
+
+
+async def read_inputs(file: IO[str]) -> AsyncIterator[str]:
+    """Yield stripped, non-empty input lines without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    while line := await loop.run_in_executor(None, file.readline):
+        if line := line.strip():
+            yield line
+
+
+async def resolve(
+    session: aiohttp.ClientSession, resolver, line: str
+) -> dict[str, Any]:
+    """Turn an input line into the address fields the config flow stores."""
+    if line.startswith("{"):
+        return json.loads(line)
+    matches = await resolver.search(session, line)
+    if not matches:
+        raise LookupError("Address not found")
+    return matches[0]
+
+
+async def export_one(
+    session: aiohttp.ClientSession,
+    resolver,
+    catalogue,
+    scheduler,
+    line: str,
+) -> dict[str, Any]:
+    try:
+        found = await resolve(session, resolver, line)
+        api = api_module.MinRenovasjon(
+            session,
+            found["street_name"],
+            str(found["address_code"]),
+            str(found["house_number"]),
+            found["municipality_id"],
+            const.DEFAULT_DATE_FORMAT,
+            catalogue,
+            scheduler,
+        )
+        await api.refresh_calendar()
+    except Exception as err:  # Reported per line; one bad address must not stop the run
+        return {"input": line, "error": f"{type(err).__name__}: {err}"}
+
+    return {
+        "input": line,
+        "address": found,
+        "fractions": [
+            {
+                "id": entry.fraction_id,
+                "name": entry.name,
+                "icon": entry.icon,
+                "dates": [pickup.date().isoformat() for pickup in entry.pickup_dates],
+            }
+            for entry in api.calender_list
+        ],
+    }
+
+
+async def export(
+    inputs: AsyncIterator[str],
+    output: IO[str],
+    skip: set[str],
+    concurrency: int,
+    index_path: str | None = None,
+) -> tuple[int, int, int]:
+    """Export every input, returning how many succeeded, failed and were skipped.
+
+    Inputs are fed to a fixed pool of workers through a bounded queue, so
+    memory does not grow with the input size.
+    """
+    resolver = address.AddressResolver()
+    if index_path:
+        resolver.index = address.AddressIndex.from_csv(index_path)
+    catalogue = api_module.FractionCatalogue()
+    scheduler = request_scheduler.RequestScheduler(const.REQUEST_RATE, const.REQUEST_BURST)
+    queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=min(concurrency, const.CONNECTION_LIMIT_PER_HOST),
+        ttl_dns_cache=const.DNS_CACHE_TTL,
+        keepalive_timeout=const.KEEPALIVE_TIMEOUT,
+    )
+    async with aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=const.REQUEST_TIMEOUT),
+    ) as session:
+
+        async def worker() -> None:
+            while (line := await queue.get()) is not None:
+                result = await export_one(session, resolver, catalogue, scheduler, line)
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+                counts["failed" if "error" in result else "ok"] += 1
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            async for line in inputs:
+                if line in skip:
+                    counts["skipped"] += 1
+                    continue
+                await queue.put(line)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    return counts["ok"], counts["failed"], counts["skipped"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="file with one address per line, or - for stdin")
+    parser.add_argument("--output", "-o", help="write NDJSON here instead of stdout")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip inputs already exported to --output and append the rest",
+    )
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--index", help="Kartverket address CSV to search before Geonorge")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+    if not args.verbose:
+        # Failures are reported in the output, not once more on stderr
+        logging.getLogger(api_module.__name__).setLevel(logging.CRITICAL)
+
+    skip = completed_inputs(args.output) if args.resume else set()
+    started = time.monotonic()
+    with contextlib.ExitStack() as stack:
+        source = (
+            sys.stdin
+            if args.input == "-"
+            else stack.enter_context(open(args.input, encoding="utf-8"))
+        )
+        output = (
+            stack.enter_context(_open_output(args.output, args.resume))
+            if args.output
+            else sys.stdout
+        )
+        ok, failed, skipped = asyncio.run(
+            export(read_inputs(source), output, skip, args.concurrency, args.index)
+        )
+    print(
+        f"Exported {ok} addresses, {failed} failed, {skipped} skipped "
+        f"in {time.monotonic() - started:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
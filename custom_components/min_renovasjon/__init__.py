@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from datetime import timedelta
 import logging
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
@@ -13,41 +15,176 @@ from .const import (
     CONF_HOUSE_NO,
     CONF_COUNTY_ID,
     CONF_UPDATE_INTERVAL,
+    CONF_ADAPTIVE_REFRESH,
+    CONF_ADDRESSES,
+    CONF_ADDRESS_NAME,
+    CONF_REMINDER_OFFSETS,
     DEFAULT_DATE_FORMAT,
 )
-from .coordinator import MinRenovasjonCoordinator
+from .client import (
+    async_acquire_session,
+    async_get_icon_cache,
+    async_get_fraction_catalogue,
+    async_get_request_scheduler,
+    async_release_session,
+)
+from .coordinator import MinRenovasjonBatchCoordinator, MinRenovasjonCoordinator
+from .feed import async_register_feed_view
+from .history import PickupHistory
 from .min_renovasjon import MinRenovasjon
+from .refresh_scheduler import AdaptiveRefreshScheduler
+from .reminders import ReminderScheduler, parse_offsets
+from .services import async_setup_services
+from .snapshot import CalendarSnapshotStore, address_key, async_pop_seed
+from .tracing import Tracer
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.CALENDAR]
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _snapshot_ids(entry: ConfigEntry) -> list[str]:
+    if CONF_ADDRESSES not in entry.data:
+        return [entry.entry_id]
+    return [f"{entry.entry_id}_{address_key(address)}" for address in entry.data[CONF_ADDRESSES]]
+
+
+def _create_api(
+    hass: HomeAssistant, entry: ConfigEntry, address: dict[str, Any], tracer: Tracer
+) -> MinRenovasjon:
+    return MinRenovasjon(
+        async_acquire_session(hass, entry.entry_id),
+        address[CONF_STREET_NAME],
+        address[CONF_STREET_CODE],
+        address[CONF_HOUSE_NO],
+        address[CONF_COUNTY_ID],
+        DEFAULT_DATE_FORMAT,
+        async_get_fraction_catalogue(hass),
+        async_get_request_scheduler(hass),
+        tracer,
+    )
+
+
+async def _async_load_history(hass: HomeAssistant, history_id: str) -> PickupHistory:
+    history = PickupHistory(hass, history_id)
+    await history.async_load()
+    return history
+
+
+async def _async_setup_batch(
+    hass: HomeAssistant, entry: ConfigEntry, update_interval: int
+) -> tuple[MinRenovasjonBatchCoordinator, bool]:
+    icons = await async_get_icon_cache(hass)
+    # One tracer per entry, so the tracing service switches every address at once
+    tracer = Tracer(entry.entry_id)
+    children = []
+    for address, snapshot_id in zip(entry.data[CONF_ADDRESSES], _snapshot_ids(entry)):
+        child = MinRenovasjonCoordinator(
+            hass,
+            _create_api(hass, entry, address, tracer),
+            None,
+            CalendarSnapshotStore(hass, snapshot_id),
+            address_key=address_key(address),
+            address_name=address[CONF_ADDRESS_NAME],
+            icons=icons,
+            history=await _async_load_history(hass, snapshot_id),
+        )
+        child.config_entry = entry
+        children.append(child)
+
+    coordinator = MinRenovasjonBatchCoordinator(hass, children, update_interval, tracer=tracer)
+    coordinator.config_entry = entry
+    # Entities listen to the per-address coordinators; this keeps the batch polling
+    entry.async_on_unload(coordinator.async_add_listener(lambda: None))
+
+    # A batch that was just validated by the config flow needs no requests at all
+    seeds = [async_pop_seed(hass, child.address_key) for child in children]
+    if all(seeds):
+        for child, seed in zip(children, seeds):
+            await child.async_apply_seed(seed)
+        return coordinator, False
+
+    restored = [await child.async_restore_snapshot() for child in children]
+    if all(restored):
+        return coordinator, True
+
+    await coordinator.async_config_entry_first_refresh()
+    return coordinator, False
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Min Renovasjon from a config entry."""
     _LOGGER.debug("Setting up Min Renovasjon")
-    api = MinRenovasjon(
-        entry.data[CONF_STREET_NAME],
-        entry.data[CONF_STREET_CODE],
-        entry.data[CONF_HOUSE_NO],
-        entry.data[CONF_COUNTY_ID],
-        DEFAULT_DATE_FORMAT
-    )
-    await api.get_fraction_types()
-    coordinator = MinRenovasjonCoordinator(hass, api, entry.data.get(CONF_UPDATE_INTERVAL, 24))
-    coordinator.config_entry = entry  # Add config_entry reference
+    update_interval = entry.data.get(CONF_UPDATE_INTERVAL, 24)
 
-    await coordinator.async_config_entry_first_refresh()
+    if CONF_ADDRESSES in entry.data:
+        coordinator, restored = await _async_setup_batch(hass, entry, update_interval)
+    else:
+        refresh_scheduler = None
+        if entry.data.get(CONF_ADAPTIVE_REFRESH, False):
+            refresh_scheduler = AdaptiveRefreshScheduler(
+                timedelta(hours=update_interval), entry.entry_id
+            )
+        coordinator = MinRenovasjonCoordinator(
+            hass,
+            _create_api(hass, entry, entry.data, Tracer(entry.entry_id)),
+            update_interval,
+            CalendarSnapshotStore(hass, entry.entry_id),
+            refresh_scheduler,
+            icons=await async_get_icon_cache(hass),
+            history=await _async_load_history(hass, entry.entry_id),
+        )
+        coordinator.config_entry = entry  # Add config_entry reference
+
+        # Start from the calendar the config flow just validated, or from the last
+        # persisted one and revalidate in the background; only block setup on
+        # the network when there is neither.
+        if seed := async_pop_seed(hass, address_key(entry.data)):
+            await coordinator.async_apply_seed(seed)
+            restored = False
+        elif not (restored := await coordinator.async_restore_snapshot()):
+            await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    async_register_feed_view(hass)
+    async_setup_services(hass)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    for address_coordinator in coordinator.address_coordinators:
+        entry.async_on_unload(address_coordinator.async_schedule_midnight_rollover())
+
+    try:
+        # Entries created before reminders existed keep them off until set
+        offsets = parse_offsets(entry.data.get(CONF_REMINDER_OFFSETS, ""))
+    except ValueError as err:
+        _LOGGER.warning("Invalid reminder offsets, reminders are off: %s", err)
+        offsets = ()
+    if offsets:
+        entry.async_on_unload(
+            ReminderScheduler(
+                hass, entry.entry_id, coordinator.address_coordinators, offsets
+            ).async_start()
+        )
+
+    if restored:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} revalidate {entry.entry_id}"
+        )
+
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        await async_release_session(hass, entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted calendar snapshots and pickup history of a deleted entry."""
+    for snapshot_id in _snapshot_ids(entry):
+        await CalendarSnapshotStore(hass, snapshot_id).async_remove()
+        await PickupHistory(hass, snapshot_id).async_remove()
@@ -0,0 +1,205 @@
+"""Address resolution for Min Renovasjon: cache, offline index and Geonorge."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Iterable
+import csv
+import logging
+import re
+import sys
+import time
+from typing import Any
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+GEONORGE_API_URL = "https://ws.geonorge.no/adresser/v1/sok"
+
+MAX_RESULTS = 10
+
+_SEPARATORS = re.compile(r"[\s,]+")
+
+
+def normalize_query(query: str) -> str:
+    """Normalise an address query so equivalent spellings share a cache entry."""
+    return " ".join(_SEPARATORS.split(query.casefold())).strip()
+
+
+def map_geonorge_address(addr: dict[str, Any]) -> dict[str, Any]:
+    """Map a Geonorge address to the format used by the config flow."""
+    return {
+        "street_name": addr.get("adressenavn", ""),
+        "house_number": str(addr.get("nummer", "")),
+        "postal_code": addr.get("postnummer", ""),
+        "city": addr.get("poststed", ""),
+        "municipality_id": addr.get("kommunenummer", ""),
+        "municipality_name": addr.get("kommunenavn", ""),
+        "address_code": addr.get("adressekode", ""),
+        "full_address": addr.get("adressetekst", ""),
+    }
+
+
+async def search_geonorge(session: aiohttp.ClientSession, address: str) -> list[dict[str, Any]]:
+    """Search for address using Geonorge API.
+
+    Args:
+        address: The address to search for (e.g., "Seljeveien 50 3158 Andebu")
+
+    Returns:
+        List of matching addresses with their details
+    """
+    async with session.get(
+        GEONORGE_API_URL,
+        params={"sok": address},
+        timeout=aiohttp.ClientTimeout(total=10),
+    ) as response:
+        response.raise_for_status()
+        data = await response.json()
+
+    return [map_geonorge_address(addr) for addr in data.get("adresser", [])]
+
+
+class AddressCache:
+    """LRU cache of search results by normalised query, with a TTL."""
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600.0) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, list[dict[str, Any]]]] = OrderedDict()
+
+    def get(self, key: str) -> list[dict[str, Any]] | None:
+        if (cached := self._entries.get(key)) is None:
+            return None
+        if time.monotonic() - cached[0] > self._ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return cached[1]
+
+    def put(self, key: str, results: list[dict[str, Any]]) -> None:
+        self._entries[key] = (time.monotonic(), results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+
+class AddressIndex:
+    """Prefix index over an imported address file such as Kartverket's CSV.
+
+    Rows are kept as tuples with interned locality strings. The index itself
+    is a sorted list of normalised "street number" keys with a parallel
+    array of row numbers, so a lookup is a bisection plus a short scan.
+    """
+
+    # Row layout
+    _STREET, _NUMBER, _POSTAL_CODE, _CITY, _MUNICIPALITY_ID, _MUNICIPALITY, _CODE, _TEXT = range(8)
+
+    def __init__(self, rows: Iterable[tuple[str, ...]]) -> None:
+        self._rows = list(rows)
+        keyed = sorted(
+            (normalize_query(f"{row[self._STREET]} {row[self._NUMBER]}"), position)
+            for position, row in enumerate(self._rows)
+        )
+        self._keys = [key for key, _ in keyed]
+        self._positions = array("I", (position for _, position in keyed))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @classmethod
+    def from_csv(cls, path: str) -> AddressIndex:
+        """Build the index from a Kartverket address CSV (semicolon separated)."""
+        intern = sys.intern
+
+        def _rows():
+            with open(path, encoding="utf-8-sig", newline="") as file:
+                reader = csv.DictReader(file, delimiter=";")
+                reader.fieldnames = [name.casefold() for name in reader.fieldnames or []]
+                for row in reader:
+                    number = f"{row.get('nummer', '')}{row.get('bokstav', '')}"
+                    street = row.get("adressenavn", "")
+                    yield (
+                        intern(street),
+                        number,
+                        intern(row.get("postnummer", "")),
+                        intern(row.get("poststed", "")),
+                        intern(row.get("kommunenummer", "")),
+                        intern(row.get("kommunenavn", "")),
+                        intern(row.get("adressekode", "")),
+                        row.get("adressetekst") or f"{street} {number}",
+                    )
+
+        index = cls(_rows())
+        _LOGGER.debug("Indexed %d addresses from %s", len(index), path)
+        return index
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> list[dict[str, Any]]:
+        """Return addresses matching "street [number] [postcode/city/municipality]"."""
+        tokens = normalize_query(query).split(" ")
+        split = next(
+            (i for i, token in enumerate(tokens) if i and token[:1].isdigit()),
+            len(tokens),
+        )
+        street = " ".join(tokens[:split])
+        number = tokens[split] if split < len(tokens) else ""
+        locality = tokens[split + 1:]
+        prefix = f"{street} {number}" if number else f"{street} "
+
+        results = []
+        for key_index in range(bisect_left(self._keys, prefix), len(self._keys)):
+            key = self._keys[key_index]
+            if not key.startswith(prefix):
+                break
+            # "storgata 1" must match 1 and 1a, but not 10
+            if number and key[len(prefix):len(prefix) + 1].isdigit():
+                continue
+            row = self._rows[self._positions[key_index]]
+            if locality and not self._matches_locality(row, locality):
+                continue
+            results.append(self._to_result(row))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _matches_locality(self, row: tuple[str, ...], tokens: list[str]) -> bool:
+        haystack = " ".join(
+            (row[self._POSTAL_CODE], row[self._CITY], row[self._MUNICIPALITY])
+        ).casefold().split(" ")
+        return all(any(word.startswith(token) for word in haystack) for token in tokens)
+
+    def _to_result(self, row: tuple[str, ...]) -> dict[str, Any]:
+        return {
+            "street_name": row[self._STREET],
+            "house_number": row[self._NUMBER],
+            "postal_code": row[self._POSTAL_CODE],
+            "city": row[self._CITY],
+            "municipality_id": row[self._MUNICIPALITY_ID],
+            "municipality_name": row[self._MUNICIPALITY],
+            "address_code": row[self._CODE],
+            "full_address": row[self._TEXT],
+        }
+
+
+class AddressResolver:
+    """Resolve address queries from the cache, the offline index, then Geonorge."""
+
+    def __init__(self, cache: AddressCache | None = None) -> None:
+        self._cache = cache if cache is not None else AddressCache()
+        self.index: AddressIndex | None = None
+
+    async def search(
+        self, session: aiohttp.ClientSession, query: str
+    ) -> list[dict[str, Any]]:
+        key = normalize_query(query)
+        if (results := self._cache.get(key)) is not None:
+            _LOGGER.debug("Address cache hit for %s", key)
+            return results
+
+        results = self.index.search(key) if self.index is not None else []
+        if not results:
+            results = await search_geonorge(session, query)
+        self._cache.put(key, results)
+        return results
@@ -1,31 +1,72 @@
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 from .const import DOMAIN
 from .coordinator import MinRenovasjonCoordinator
-from datetime import datetime, time
+from .entity import MinRenovasjonEntity
+from .feed import feed_url
+from .schedule import Pickup
+from datetime import datetime, time, timedelta
+from itertools import chain
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+PREDICTED_DESCRIPTION = (
+    "Predicted from the fraction's recurring schedule; "
+    "not yet published by Min Renovasjon."
+)
+
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the Min Renovasjon calendar."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([MinRenovasjonCalendar(coordinator)], True)
+    # The coordinator already holds data here; updating before add would
+    # trigger a refresh and defeat the snapshot and config flow seed
+    async_add_entities(
+        [MinRenovasjonCalendar(address_coordinator) for address_coordinator in coordinator.address_coordinators]
+    )
 
-class MinRenovasjonCalendar(CoordinatorEntity, CalendarEntity):
+class MinRenovasjonCalendar(MinRenovasjonEntity, CalendarEntity):
     """Min Renovasjon Calendar."""
 
+    _unrecorded_attributes = frozenset({"feed_url"})
+
     def __init__(self, coordinator: MinRenovasjonCoordinator):
         """Initialize Min Renovasjon Calendar."""
         super().__init__(coordinator)
-        self._attr_name = "Min Renovasjon Collection"
-        # Safe unique_id generation with fallback
-        try:
-            entry_id = coordinator.config_entry.entry_id
-        except AttributeError:
-            entry_id = "min_renovasjon_unknown"
-        self._attr_unique_id = f"{entry_id}_calendar"
+        self._attr_name = f"{coordinator.entity_name_prefix} Collection"
+        self._attr_unique_id = f"{coordinator.unique_id_prefix}_calendar"
+        # CalendarEvents built for the current timeline generation, by timeline index
+        self._events: dict[int, CalendarEvent] = {}
+        self._events_generation = None
+
+    def _get_event(self, index: int) -> CalendarEvent:
+        """Return the cached event for a timeline index, building it on first use."""
+        timeline = self.coordinator.timeline
+        if self._events_generation != timeline.generation:
+            self._events = {}
+            self._events_generation = timeline.generation
+
+        if (event := self._events.get(index)) is None:
+            event = self._events[index] = self._build_event(timeline[index])
+        return event
+
+    @staticmethod
+    def _build_event(pickup: Pickup) -> CalendarEvent:
+        # Make dates timezone-aware for comparison and event creation
+        return CalendarEvent(
+            summary=(
+                f"{pickup.fraction_name} (predicted)"
+                if pickup.predicted
+                else pickup.fraction_name
+            ),
+            start=datetime.combine(pickup.day, time.min).replace(tzinfo=dt_util.UTC),
+            end=datetime.combine(pickup.day, time(23, 59)).replace(tzinfo=dt_util.UTC),
+            description=PREDICTED_DESCRIPTION if pickup.predicted else None,
+        )
+
+    @property
+    def extra_state_attributes(self):
+        return {"feed_url": feed_url(self.coordinator), **self.coordinator.stale_attributes}
 
     @property
     def event(self):
@@ -33,80 +74,42 @@ class MinRenovasjonCalendar(CoordinatorEntity, CalendarEntity):
         if not self.coordinator.data:
             return None
 
-        # Find the earliest upcoming collection from all fractions
-        earliest_event = None
-        earliest_date = None
-
-        for fraction_data in self.coordinator.data.values():
-            if not fraction_data or len(fraction_data) < 4:
-                continue
-
-            fraction_id = fraction_data[0]
-            fraction_name = fraction_data[1]
-            next_pickup = fraction_data[3]
-            next_next_pickup = fraction_data[4] if len(fraction_data) >= 5 else None
-
-            # Check both next and next-next dates
-            for pickup_date in [next_pickup, next_next_pickup]:
-                if pickup_date is None or not isinstance(pickup_date, datetime):
-                    continue
-
-                if earliest_date is None or pickup_date < earliest_date:
-                    earliest_date = pickup_date
-                    try:
-                        start_datetime = datetime.combine(pickup_date.date(), time.min).replace(tzinfo=dt_util.UTC)
-                        end_datetime = datetime.combine(pickup_date.date(), time(23, 59)).replace(tzinfo=dt_util.UTC)
-                        earliest_event = CalendarEvent(
-                            summary=fraction_name,
-                            start=start_datetime,
-                            end=end_datetime,
-                        )
-                    except (AttributeError, TypeError, ValueError) as e:
-                        _LOGGER.warning(f"Error processing calendar event dates: {e}")
-                        continue
-
-        return earliest_event
+        timeline = self.coordinator.timeline
+        today = dt_util.now().date()
+        if (index := timeline.first_on_or_after(today)) is not None:
+            return self._get_event(index)
+        # Past the last published pickup, fall back to the recurrence
+        predicted = timeline.first_predicted_on_or_after(today)
+        return self._build_event(predicted) if predicted is not None else None
 
     async def async_get_events(self, hass, start_date, end_date):
         """Return events within a start and end date."""
         if not self.coordinator.data:
             return []
 
+        # Widen by a day so events straddling the range edges are candidates,
+        # then keep the ones that actually overlap
+        timeline = self.coordinator.timeline
+        first_day = start_date.astimezone(dt_util.UTC).date() - timedelta(days=1)
+        last_day = end_date.astimezone(dt_util.UTC).date()
+        indices = timeline.index_range(first_day, last_day)
+
+        # Predicted pickups are expanded for the requested range only
+        predicted = timeline.predicted_range(first_day, last_day)
+
+        # Recorded history covers the days before the timeline starts
+        recorded = []
+        if self.coordinator.history is not None:
+            history_end = timeline[0].day - timedelta(days=1) if len(timeline) else last_day
+            recorded = self.coordinator.history.pickups(first_day, min(last_day, history_end))
+
         events = []
-        processed_dates = set()  # Track processed dates to avoid duplicates
-
-        for fraction_data in self.coordinator.data.values():
-            if not fraction_data or len(fraction_data) < 5:
-                continue
-
-            # Get the collection dates (indices 3 and 4 are next_pickup and next_next_pickup)
-            fraction_id = fraction_data[0]
-            fraction_name = fraction_data[1]
-            next_pickup = fraction_data[3]
-            next_next_pickup = fraction_data[4]
-
-            dates = [next_pickup, next_next_pickup]
-            for date in dates:
-                if date is None:
-                    continue
-
-                # Create unique key combining date and fraction to allow multiple collections on same day
-                date_key = (date.date(), fraction_id)
-                if date_key in processed_dates:
-                    continue
-                processed_dates.add(date_key)
-
-                # Make dates timezone-aware for comparison and event creation
-                date_midnight = datetime.combine(date.date(), time.min).replace(tzinfo=dt_util.UTC)
-                date_same_day_end = datetime.combine(date.date(), time(23, 59)).replace(tzinfo=dt_util.UTC)
-
-                if start_date <= date_midnight <= end_date or start_date <= date_same_day_end <= end_date:
-                    events.append(
-                        CalendarEvent(
-                            summary=fraction_name,
-                            start=date_midnight,
-                            end=date_same_day_end,
-                        )
-                    )
+        for event in chain(
+            map(self._build_event, recorded),
+            (self._get_event(index) for index in indices),
+            map(self._build_event, predicted),
+        ):
+            if start_date <= event.start <= end_date or start_date <= event.end <= end_date:
+                events.append(event)
 
         return events
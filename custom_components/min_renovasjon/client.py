@@ -0,0 +1,187 @@
+"""Shared HTTP client for the Min Renovasjon integration."""
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.util.ssl import get_default_context
+
+from .icons import IconCache, MinRenovasjonIconView
+from .min_renovasjon import FractionCatalogue
+from .request_scheduler import RequestScheduler
+from .const import (
+    DOMAIN,
+    CONNECTION_LIMIT,
+    CONNECTION_LIMIT_PER_HOST,
+    DNS_CACHE_TTL,
+    KEEPALIVE_TIMEOUT,
+    REQUEST_TIMEOUT,
+    REQUEST_RATE,
+    REQUEST_BURST,
+)
+
+if TYPE_CHECKING:
+    from .address import AddressResolver
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CLIENT = f"{DOMAIN}_client"
+DATA_CATALOGUE = f"{DOMAIN}_catalogue"
+DATA_REQUEST_SCHEDULER = f"{DOMAIN}_request_scheduler"
+DATA_ADDRESS_RESOLVER = f"{DOMAIN}_address_resolver"
+DATA_ICON_CACHE = f"{DOMAIN}_icon_cache"
+
+ADDRESS_INDEX_FILE = "min_renovasjon_adresser.csv"
+
+
+class _SharedClient:
+    """Pooled session and the config entries currently using it."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        self.session = session
+        self.entry_ids: set[str] = set()
+        self.unsub_close: CALLBACK_TYPE | None = None
+
+    async def async_close(self) -> None:
+        if self.unsub_close is not None:
+            self.unsub_close()
+            self.unsub_close = None
+        await self.session.close()
+
+
+def _create_session(limit: int, limit_per_host: int) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+        ssl=get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        headers={"Accept-Encoding": "gzip, deflate"},
+        auto_decompress=True,
+    )
+
+
+@callback
+def async_get_session(
+    hass: HomeAssistant,
+    limit: int = CONNECTION_LIMIT,
+    limit_per_host: int = CONNECTION_LIMIT_PER_HOST,
+) -> aiohttp.ClientSession:
+    """Return the pooled session shared by all Min Renovasjon traffic.
+
+    The session is created on first use and closed when Home Assistant stops,
+    or earlier when the last config entry using it is unloaded.
+    """
+    shared: _SharedClient | None = hass.data.get(DATA_CLIENT)
+    if shared is not None and not shared.session.closed:
+        return shared.session
+    if shared is not None and shared.unsub_close is not None:
+        # Replacing a session closed elsewhere; its close listener goes with it
+        shared.unsub_close()
+
+    _LOGGER.debug(
+        "Creating pooled session (limit=%s, limit_per_host=%s)", limit, limit_per_host
+    )
+    shared = _SharedClient(_create_session(limit, limit_per_host))
+    hass.data[DATA_CLIENT] = shared
+
+    async def _async_close(_event: Event) -> None:
+        # The listener has fired, so there is nothing left to unsubscribe
+        shared.unsub_close = None
+        await shared.async_close()
+
+    shared.unsub_close = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return shared.session
+
+
+@callback
+def async_acquire_session(hass: HomeAssistant, entry_id: str) -> aiohttp.ClientSession:
+    """Return the pooled session and register a config entry as its user."""
+    session = async_get_session(hass)
+    hass.data[DATA_CLIENT].entry_ids.add(entry_id)
+    return session
+
+
+async def async_release_session(hass: HomeAssistant, entry_id: str) -> None:
+    """Unregister a config entry and close the session once nobody uses it."""
+    shared: _SharedClient | None = hass.data.get(DATA_CLIENT)
+    if shared is None:
+        return
+
+    shared.entry_ids.discard(entry_id)
+    if shared.entry_ids:
+        return
+
+    _LOGGER.debug("Closing pooled session")
+    hass.data.pop(DATA_CLIENT)
+    await shared.async_close()
+
+
+@callback
+def async_get_fraction_catalogue(hass: HomeAssistant) -> FractionCatalogue:
+    """Return the fraction catalogue shared by all entries."""
+    if (catalogue := hass.data.get(DATA_CATALOGUE)) is None:
+        catalogue = hass.data[DATA_CATALOGUE] = FractionCatalogue()
+    return catalogue
+
+
+@callback
+def async_get_request_scheduler(hass: HomeAssistant) -> RequestScheduler:
+    """Return the scheduler that every Min Renovasjon API request goes through."""
+    if (scheduler := hass.data.get(DATA_REQUEST_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_REQUEST_SCHEDULER] = RequestScheduler(
+            REQUEST_RATE, REQUEST_BURST
+        )
+    return scheduler
+
+
+async def async_get_icon_cache(hass: HomeAssistant) -> IconCache:
+    """Return the loaded icon cache, registering the view that serves it."""
+    if (cache := hass.data.get(DATA_ICON_CACHE)) is None:
+        cache = hass.data[DATA_ICON_CACHE] = IconCache(hass)
+        hass.http.register_view(MinRenovasjonIconView(cache))
+    await cache.async_load()
+    return cache
+
+
+@callback
+def async_get_address_resolver(hass: HomeAssistant) -> AddressResolver:
+    """Return the shared address resolver.
+
+    If an address file exported from Kartverket is placed in the config
+    directory, it is indexed in the background on first use. Searches go to
+    Geonorge until the index is ready.
+    """
+    if (resolver := hass.data.get(DATA_ADDRESS_RESOLVER)) is not None:
+        return resolver
+
+    # Only the config flow searches addresses, so setup never loads this
+    import csv
+
+    from .address import AddressIndex, AddressResolver
+
+    resolver = hass.data[DATA_ADDRESS_RESOLVER] = AddressResolver()
+    path = hass.config.path(ADDRESS_INDEX_FILE)
+
+    async def _async_load_index() -> None:
+        if not await hass.async_add_executor_job(os.path.isfile, path):
+            return
+        try:
+            resolver.index = await hass.async_add_executor_job(AddressIndex.from_csv, path)
+        except (OSError, ValueError, csv.Error) as err:
+            _LOGGER.warning("Could not index addresses from %s: %s", path, err)
+
+    hass.async_create_background_task(
+        _async_load_index(), f"{DOMAIN} address index"
+    )
+    return resolver
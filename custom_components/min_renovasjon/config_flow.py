@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 import voluptuous as vol
-import aiohttp
 import re
 
 from homeassistant import config_entries
@@ -17,16 +17,28 @@ from .const import (
     CONF_HOUSE_NO,
     CONF_COUNTY_ID,
     CONF_UPDATE_INTERVAL,
+    CONF_ADAPTIVE_REFRESH,
+    CONF_ADDRESSES,
+    CONF_ADDRESS_NAME,
+    CONF_REMINDER_OFFSETS,
     DEFAULT_UPDATE_INTERVAL,
+    DEFAULT_REMINDER_OFFSETS,
+    DEFAULT_BATCH_CONCURRENCY,
+)
+from .client import (
+    async_get_address_resolver,
+    async_get_fraction_catalogue,
+    async_get_request_scheduler,
+    async_get_session,
 )
 from .min_renovasjon import MinRenovasjon
+from .reminders import parse_offsets
+from .snapshot import address_key, async_store_seed
 
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
-GEONORGE_API_URL = "https://ws.geonorge.no/adresser/v1/sok"
-
 STEP_USER_DATA_SCHEMA = vol.Schema({
     vol.Required("address"): str,
 })
@@ -40,6 +52,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._address = None
         self._address_search_results = None
         self._selected_address = None
+        self._batch_addresses = None
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -55,6 +68,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         self._address = user_input["address"]
 
+        # Several addresses separated by ";" are set up as one batch entry
+        queries = [query.strip() for query in self._address.split(";") if query.strip()]
+        if len(queries) > 1:
+            return await self._async_search_batch(queries)
+
         # Search for address using Geonorge API
         try:
             self._address_search_results = await self._search_address(self._address)
@@ -83,8 +101,36 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         # Multiple results - show selection
         return await self.async_step_select_address()
 
+    async def _async_search_batch(self, queries: list[str]) -> FlowResult:
+        """Resolve every address of a batch; each must match exactly one address."""
+        errors: dict[str, str] = {}
+
+        try:
+            results = await asyncio.gather(*(self._search_address(query) for query in queries))
+        except Exception as err:
+            _LOGGER.error("Address search failed: %s", err)
+            errors["base"] = "search_failed"
+            return self.async_show_form(
+                step_id="user",
+                data_schema=STEP_USER_DATA_SCHEMA,
+                errors=errors,
+            )
+
+        unresolved = [query for query, matches in zip(queries, results) if len(matches) != 1]
+        if unresolved:
+            errors["base"] = "ambiguous_address"
+            return self.async_show_form(
+                step_id="user",
+                data_schema=STEP_USER_DATA_SCHEMA,
+                errors=errors,
+                description_placeholders={"addresses": ", ".join(unresolved)},
+            )
+
+        self._batch_addresses = [matches[0] for matches in results]
+        return await self.async_step_confirm_batch()
+
     async def _search_address(self, address: str) -> list[dict[str, Any]]:
-        """Search for address using Geonorge API.
+        """Search for address, from the cache or local index when possible.
 
         Args:
             address: The address to search for (e.g., "Seljeveien 50 3158 Andebu")
@@ -92,30 +138,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         Returns:
             List of matching addresses with their details
         """
-        url = f"{GEONORGE_API_URL}?sok={address}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                response.raise_for_status()
-                data = await response.json()
-
-                addresses = data.get("adresser", [])
-
-                # Map Geonorge fields to our format
-                results = []
-                for addr in addresses:
-                    results.append({
-                        "street_name": addr.get("adressenavn", ""),
-                        "house_number": str(addr.get("nummer", "")),
-                        "postal_code": addr.get("postnummer", ""),
-                        "city": addr.get("poststed", ""),
-                        "municipality_id": addr.get("kommunenummer", ""),
-                        "municipality_name": addr.get("kommunenavn", ""),
-                        "address_code": addr.get("adressekode", ""),
-                        "full_address": addr.get("adressetekst", ""),
-                    })
-
-                return results
+        return await async_get_address_resolver(self.hass).search(
+            async_get_session(self.hass), address
+        )
 
     async def async_step_select_address(
         self, user_input: dict[str, Any] | None = None
@@ -178,18 +203,39 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_UPDATE_INTERVAL,
                 DEFAULT_UPDATE_INTERVAL
             ),
+            CONF_ADAPTIVE_REFRESH: user_input.get(CONF_ADAPTIVE_REFRESH, False),
+            CONF_REMINDER_OFFSETS: user_input.get(CONF_REMINDER_OFFSETS, ""),
         }
 
+        try:
+            parse_offsets(config_data[CONF_REMINDER_OFFSETS])
+        except ValueError:
+            errors[CONF_REMINDER_OFFSETS] = "invalid_reminder_offsets"
+            return self.async_show_form(
+                step_id="confirm",
+                data_schema=self._get_confirmation_schema(),
+                errors=errors,
+                description_placeholders={
+                    "street_name": self._selected_address.get("street_name", ""),
+                    "house_number": self._selected_address.get("house_number", ""),
+                    "postal_code": self._selected_address.get("postal_code", ""),
+                    "city": self._selected_address.get("city", ""),
+                    "municipality": self._selected_address.get("municipality_name", ""),
+                },
+            )
+
         # Validate the configuration by trying to fetch data
         try:
             api = MinRenovasjon(
+                async_get_session(self.hass),
                 config_data[CONF_STREET_NAME],
                 config_data[CONF_STREET_CODE],
                 config_data[CONF_HOUSE_NO],
                 config_data[CONF_COUNTY_ID],
-                "%d/%m/%Y"
+                "%d/%m/%Y",
+                async_get_fraction_catalogue(self.hass),
+                async_get_request_scheduler(self.hass),
             )
-            await api.get_fraction_types()
             await api.refresh_calendar()
         except Exception as err:
             _LOGGER.error("Validation failed: %s", err)
@@ -207,6 +253,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 },
             )
 
+        # Setup serves this calendar instead of fetching it again
+        async_store_seed(self.hass, address_key(config_data), api)
         return self.async_create_entry(
             title=(
                 f"Min Renovasjon - {self._selected_address.get('street_name', '')} "
@@ -216,14 +264,97 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data=config_data
         )
 
-    def _get_confirmation_schema(self):
+    async def async_step_confirm_batch(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle confirmation of a batch - verify every address and create one entry."""
+        errors: dict[str, str] = {}
+        labels = "\n".join(addr["full_address"] for addr in self._batch_addresses)
+
+        if user_input is not None:
+            reminder_offsets = user_input.get(CONF_REMINDER_OFFSETS, "")
+            try:
+                parse_offsets(reminder_offsets)
+            except ValueError:
+                errors[CONF_REMINDER_OFFSETS] = "invalid_reminder_offsets"
+
+        if user_input is not None and not errors:
+            addresses = [
+                {
+                    CONF_STREET_NAME: addr.get("street_name", ""),
+                    CONF_STREET_CODE: str(addr.get("address_code", "")),
+                    CONF_HOUSE_NO: str(addr.get("house_number", "")),
+                    CONF_COUNTY_ID: str(addr.get("municipality_id", "")),
+                    CONF_ADDRESS_NAME: addr.get("full_address", ""),
+                }
+                for addr in self._batch_addresses
+            ]
+            semaphore = asyncio.Semaphore(DEFAULT_BATCH_CONCURRENCY)
+
+            async def _validate(address: dict[str, str]) -> None:
+                api = MinRenovasjon(
+                    async_get_session(self.hass),
+                    address[CONF_STREET_NAME],
+                    address[CONF_STREET_CODE],
+                    address[CONF_HOUSE_NO],
+                    address[CONF_COUNTY_ID],
+                    "%d/%m/%Y",
+                    async_get_fraction_catalogue(self.hass),
+                    async_get_request_scheduler(self.hass),
+                )
+                async with semaphore:
+                    await api.refresh_calendar()
+                async_store_seed(self.hass, address_key(address), api)
+
+            results = await asyncio.gather(
+                *(_validate(address) for address in addresses), return_exceptions=True
+            )
+            failed = [
+                address[CONF_ADDRESS_NAME]
+                for address, result in zip(addresses, results)
+                if isinstance(result, Exception)
+            ]
+            if not failed:
+                return self.async_create_entry(
+                    title=f"Min Renovasjon - {len(addresses)} addresses",
+                    data={
+                        CONF_ADDRESSES: addresses,
+                        CONF_UPDATE_INTERVAL: user_input.get(
+                            CONF_UPDATE_INTERVAL,
+                            DEFAULT_UPDATE_INTERVAL
+                        ),
+                        CONF_REMINDER_OFFSETS: reminder_offsets,
+                    },
+                )
+            _LOGGER.error("Validation failed for %s", failed)
+            errors["base"] = "cannot_connect"
+            labels = ", ".join(failed)
+
+        return self.async_show_form(
+            step_id="confirm_batch",
+            data_schema=self._get_confirmation_schema(adaptive=False),
+            errors=errors,
+            description_placeholders={"addresses": labels},
+        )
+
+    def _get_confirmation_schema(self, adaptive: bool = True):
         """Create the confirmation form schema."""
-        return vol.Schema({
+        schema = {
             vol.Optional(CONF_UPDATE_INTERVAL, default=DEFAULT_UPDATE_INTERVAL): vol.All(
                 vol.Coerce(int),
                 vol.Range(min=1, max=168)
             ),
-        })
+        }
+        if adaptive:
+            schema[vol.Optional(CONF_ADAPTIVE_REFRESH, default=False)] = bool
+        # Suggested rather than defaulted, so clearing the field turns reminders off
+        schema[
+            vol.Optional(
+                CONF_REMINDER_OFFSETS,
+                description={"suggested_value": DEFAULT_REMINDER_OFFSETS},
+            )
+        ] = str
+        return vol.Schema(schema)
 
 
 class CannotConnect(HomeAssistantError):
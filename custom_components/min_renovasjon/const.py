@@ -7,7 +7,45 @@ CONF_STREET_CODE: Final = "street_code"
 CONF_HOUSE_NO: Final = "house_no"
 CONF_COUNTY_ID: Final = "county_id"
 CONF_UPDATE_INTERVAL: Final = "update_interval"
+CONF_ADAPTIVE_REFRESH: Final = "adaptive_refresh"
+CONF_ADDRESSES: Final = "addresses"
+CONF_ADDRESS_NAME: Final = "address_name"
+CONF_REMINDER_OFFSETS: Final = "reminder_offsets"
 DEFAULT_DATE_FORMAT: Final = "%d/%m/%Y"
 DEFAULT_UPDATE_INTERVAL: Final = 24
+# Hours before the pickup day starts; 4 is 20:00 the evening before
+DEFAULT_REMINDER_OFFSETS: Final = "4"
+
+EVENT_REMINDER: Final = f"{DOMAIN}_reminder"
+
+SERVICE_GET_SCHEDULE: Final = "get_schedule"
+ATTR_CONFIG_ENTRY_ID: Final = "config_entry_id"
+ATTR_START: Final = "start"
+ATTR_END: Final = "end"
+# get_schedule covers this many days when no end date is given
+DEFAULT_SCHEDULE_DAYS: Final = 30
+
+SERVICE_GET_STATISTICS: Final = "get_statistics"
+# get_statistics covers this many days back when no start date is given
+DEFAULT_STATISTICS_DAYS: Final = 365
+
+SERVICE_SET_TRACING: Final = "set_tracing"
+ATTR_ENABLED: Final = "enabled"
+ATTR_SAMPLE_RATE: Final = "sample_rate"
+ATTR_PROFILE_SECONDS: Final = "profile_seconds"
+MAX_PROFILE_SECONDS: Final = 300
 
 COORDINATOR: Final = "coordinator"
+
+# Shared HTTP client
+CONNECTION_LIMIT: Final = 20
+CONNECTION_LIMIT_PER_HOST: Final = 4
+DNS_CACHE_TTL: Final = 300
+KEEPALIVE_TIMEOUT: Final = 60
+REQUEST_TIMEOUT: Final = 10
+# Token bucket shared by every request to the Min Renovasjon API
+REQUEST_RATE: Final = 2.0
+REQUEST_BURST: Final = 10
+
+# Batch entries refresh at most this many addresses at once
+DEFAULT_BATCH_CONCURRENCY: Final = CONNECTION_LIMIT_PER_HOST
@@ -1,43 +1,376 @@
 """DataUpdateCoordinator for Min Renovasjon integration."""
+from __future__ import annotations
+
+import asyncio
 from datetime import timedelta
 import logging
+import time
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import DOMAIN, DEFAULT_BATCH_CONCURRENCY
+from .history import PickupHistory
+from .icons import IconCache
+from .ics import IcsFeed, render_ics
+from .metrics import Histogram
 from .min_renovasjon import MinRenovasjon
+from .refresh_scheduler import AdaptiveRefreshScheduler
+from .request_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, REQUEST_PRIORITY
+from .schedule import CollectionTimeline
+from .snapshot import CalendarSeed, CalendarSnapshotStore
+from .tracing import Tracer
+from .views import SensorView, build_fraction_view, build_next_collection_view
 
 _LOGGER = logging.getLogger(__name__)
 
+NEXT_COLLECTION_VIEW = "next_collection"
+
+# How soon to retry while serving stale data after a failed refresh
+STALE_RETRY_INTERVAL = timedelta(minutes=30)
+
 class MinRenovasjonCoordinator(DataUpdateCoordinator):
     fractions = []
 
-    def __init__(self, hass: HomeAssistant, min_renovasjon: MinRenovasjon, update_interval_hours: int = 24) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        min_renovasjon: MinRenovasjon,
+        update_interval_hours: int | None = 24,
+        snapshot: CalendarSnapshotStore | None = None,
+        refresh_scheduler: AdaptiveRefreshScheduler | None = None,
+        address_key: str | None = None,
+        address_name: str | None = None,
+        icons: IconCache | None = None,
+        history: PickupHistory | None = None,
+    ) -> None:
         super().__init__(
             hass,
             _LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(hours=update_interval_hours),
+            name=f"{DOMAIN} {address_name}" if address_name else DOMAIN,
+            # Addresses of a batch entry are refreshed by their batch coordinator
+            update_interval=(
+                timedelta(hours=update_interval_hours)
+                if update_interval_hours is not None
+                else None
+            ),
         )
         self.min_renovasjon = min_renovasjon
+        # Shared with the client, so one switch traces the whole update
+        self.tracer = min_renovasjon.tracer
+        self.address_key = address_key
+        self.address_name = address_name
+        self._snapshot = snapshot
+        self.refresh_scheduler = refresh_scheduler
+        self._icons = icons
+        self.history = history
+        self.timeline = CollectionTimeline([])
+        # iCalendar feed of the timeline, rendered when the schedule changes
+        self.ics_feed: IcsFeed | None = None
+        # Fingerprint of each fraction's calendar, and the fractions whose
+        # fingerprint changed in the most recent refresh
+        self._fingerprints: dict[str, int] = {}
+        self.changed_fractions: set[str] = set()
+        self.sensor_views: dict[str, SensorView] = {}
+        self.next_collection_view = build_next_collection_view([], dt_util.now().date())
+        # Sensor views (fraction ids and NEXT_COLLECTION_VIEW) that changed in the
+        # most recent refresh or midnight rollover
+        self.changed_views: set[str] = set()
+        # When the served data was fetched, and since when refreshes have failed
+        self.data_fetched = None
+        self.stale_since = None
+        self.stale_changed = False
+        self._base_update_interval = self.update_interval
+        # Wall time spent in each update, successful or not
+        self.update_duration = Histogram()
+        self.failed_updates = 0
+
+    @property
+    def address_coordinators(self) -> list[MinRenovasjonCoordinator]:
+        """Return the coordinators that entities should be created for."""
+        return [self]
+
+    @property
+    def unique_id_prefix(self) -> str:
+        try:
+            entry_id = self.config_entry.entry_id
+        except AttributeError:
+            entry_id = "min_renovasjon_unknown"
+        return f"{entry_id}_{self.address_key}" if self.address_key else entry_id
+
+    @property
+    def entity_name_prefix(self) -> str:
+        return f"Min Renovasjon {self.address_name}" if self.address_name else "Min Renovasjon"
+
+    @property
+    def stale(self) -> bool:
+        return self.stale_since is not None
+
+    @property
+    def stale_attributes(self) -> dict[str, Any]:
+        """Attributes marking served data as stale, empty while it is fresh."""
+        if self.stale_since is None:
+            return {}
+        return {
+            "stale": True,
+            "stale_since": self.stale_since.isoformat(),
+            "data_fetched": self.data_fetched.isoformat() if self.data_fetched else None,
+        }
+
+    async def async_restore_snapshot(self) -> bool:
+        """Serve the last persisted calendar without touching the network."""
+        if self._snapshot is None:
+            return False
+        if (saved := await self._snapshot.async_restore(self.min_renovasjon)) is None:
+            return False
+        self.data_fetched = saved
+        self.async_set_updated_data(self._build_data())
+        return True
+
+    async def async_apply_seed(self, seed: CalendarSeed) -> None:
+        """Serve a calendar the config flow just fetched, as if refreshed now."""
+        self.min_renovasjon.restore(seed.fraction_types, seed.calendar_list)
+        if self._icons is not None:
+            await self._icons.async_fetch_missing(
+                self.min_renovasjon, {entry.icon for entry in seed.calendar_list}
+            )
+        self.data_fetched = dt_util.as_local(seed.fetched)
+        data = self._build_data()
+        if self._snapshot is not None:
+            self._snapshot.async_save(self.min_renovasjon)
+        if self.refresh_scheduler is not None:
+            self._plan_next_refresh(True)
+        self.async_set_updated_data(data)
 
     async def _async_update_data(self):
+        # Entities waiting for their first data go ahead of periodic refreshes
+        priority = REQUEST_PRIORITY.set(
+            PRIORITY_INTERACTIVE if self.data is None else PRIORITY_BACKGROUND
+        )
+        started = time.perf_counter()
+        span = self.tracer.span("coordinator.update")
         try:
-            _LOGGER.debug("Starting data update in coordinator")
-            await self.min_renovasjon.refresh_calendar()
-            self.fractions = [str(fraction[0]) for fraction in self.min_renovasjon.calender_list]
-            _LOGGER.debug("Fractions after refresh: %s", self.fractions)
-            
-            data = {}
-            for fraction_id in self.fractions:
-                fraction_data = self.min_renovasjon.get_calender_for_fraction(fraction_id)
-                _LOGGER.debug("Fraction data for %s: %s", fraction_id, fraction_data)
-                data[fraction_id] = fraction_data
-            
-            _LOGGER.debug("Final data in coordinator: %s", data)
-            return data
+            with span:
+                _LOGGER.debug("Starting data update in coordinator")
+                # Fetches the calendar and, when stale, the fraction catalogue concurrently
+                await self.min_renovasjon.refresh_calendar()
+                if self._icons is not None:
+                    await self._icons.async_fetch_missing(
+                        self.min_renovasjon,
+                        {entry.icon for entry in self.min_renovasjon.calender_list},
+                    )
+                data = self._build_data()
+                if span:
+                    span.set(
+                        address=self.address_key,
+                        fractions=len(data),
+                        changed=len(self.changed_fractions),
+                    )
         except Exception as err:
-            _LOGGER.exception("Error communicating with API: %s", err)
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
+            self.failed_updates += 1
+            if self.data is None:
+                _LOGGER.exception("Error communicating with API: %s", err)
+                raise UpdateFailed(f"Error communicating with API: {err}") from err
+            return self._serve_stale(err)
+        finally:
+            REQUEST_PRIORITY.reset(priority)
+            self.update_duration.observe(time.perf_counter() - started)
+
+        self.data_fetched = dt_util.now()
+        self.stale_changed = self.stale_since is not None
+        self.stale_since = None
+        if self._base_update_interval is not None:
+            self.update_interval = self._base_update_interval
+        if self._snapshot is not None:
+            self._snapshot.async_save(self.min_renovasjon)
+        if self.refresh_scheduler is not None:
+            self._plan_next_refresh(data != self.data)
+        return data
+
+    def metrics_as_dict(self) -> dict[str, Any]:
+        """Return the coordinator's and its client's metrics for diagnostics."""
+        return {
+            "update_duration": self.update_duration.as_dict(),
+            "failed_updates": self.failed_updates,
+            "seconds_since_last_success": (
+                round((dt_util.now() - self.data_fetched).total_seconds())
+                if self.data_fetched
+                else None
+            ),
+            "stale": self.stale,
+            "client": self.min_renovasjon.metrics.as_dict(),
+        }
+
+    @callback
+    def _serve_stale(self, err: Exception):
+        """Keep serving the last good calendar while the API is failing."""
+        self.stale_changed = self.stale_since is None
+        if self.stale_since is None:
+            self.stale_since = dt_util.now()
+            _LOGGER.warning("Error communicating with API, serving cached calendar: %s", err)
+        else:
+            _LOGGER.debug("Error communicating with API, still serving cached calendar: %s", err)
+        self.changed_fractions = set()
+        self.changed_views = set()
+        if self._base_update_interval is not None:
+            self.update_interval = min(self._base_update_interval, STALE_RETRY_INTERVAL)
+        return self.data
+
+    @callback
+    def _plan_next_refresh(self, changed: bool) -> None:
+        now = dt_util.now()
+        next_index = self.timeline.first_on_or_after(now.date())
+        next_pickup = self.timeline[next_index].day if next_index is not None else None
+        self.update_interval = self.refresh_scheduler.plan(changed, next_pickup, now)
+        _LOGGER.debug(
+            "Next refresh in %s (%s)", self.update_interval, self.refresh_scheduler.reason
+        )
+
+    @callback
+    def async_update_listeners(self) -> None:
+        # Entity state writes show up as children of this span
+        with self.tracer.span("coordinator.notify") as span:
+            if span:
+                span.set(listeners=len(self._listeners))
+            super().async_update_listeners()
+
+    @callback
+    def _build_data(self):
+        calendar_list = self.min_renovasjon.calender_list
+        data = {str(entry.fraction_id): entry for entry in calendar_list}
+        self.fractions = list(data)
+        _LOGGER.debug("Fractions after refresh: %s", self.fractions)
+
+        fingerprints = {fraction_id: hash(entry) for fraction_id, entry in data.items()}
+        self.changed_fractions = {
+            fraction_id
+            for fraction_id in fingerprints.keys() | self._fingerprints.keys()
+            if fingerprints.get(fraction_id) != self._fingerprints.get(fraction_id)
+        }
+        self._fingerprints = fingerprints
+        _LOGGER.debug("Changed fractions: %s", self.changed_fractions)
+
+        with self.tracer.span("coordinator.build") as span:
+            self._build_views(data)
+            # Record from the outgoing timeline too, in case the new one no
+            # longer lists a pickup that has passed since the last rollover
+            self._record_history(self.timeline)
+            self.timeline = CollectionTimeline(calendar_list, self.timeline.generation + 1)
+            self._record_history(self.timeline)
+            previous_feed = self.ics_feed
+            self.ics_feed = render_ics(
+                self.timeline,
+                f"{self.entity_name_prefix} Collection",
+                self.unique_id_prefix,
+                previous_feed,
+            )
+            if span:
+                span.set(
+                    changed_views=len(self.changed_views),
+                    pickups=len(self.timeline),
+                    feed_rendered=self.ics_feed is not previous_feed,
+                )
+        return data
+
+    @callback
+    def _record_history(self, timeline: CollectionTimeline) -> None:
+        if self.history is not None:
+            self.history.async_record(timeline, dt_util.now().date())
+
+    @callback
+    def _build_views(self, data) -> None:
+        today = dt_util.now().date()
+        icon_urls = (
+            self._icons.local_urls(self.min_renovasjon.kommunenr)
+            if self._icons is not None
+            else None
+        )
+        sensor_views = {
+            fraction_id: build_fraction_view(self.min_renovasjon, entry, today, icon_urls)
+            for fraction_id, entry in data.items()
+        }
+        next_collection_view = build_next_collection_view(data.values(), today)
+
+        self.changed_views = {
+            fraction_id
+            for fraction_id, view in sensor_views.items()
+            if self.sensor_views.get(fraction_id) != view
+        }
+        if next_collection_view != self.next_collection_view:
+            self.changed_views.add(NEXT_COLLECTION_VIEW)
+        self.sensor_views = sensor_views
+        self.next_collection_view = next_collection_view
+
+    @callback
+    def async_schedule_midnight_rollover(self) -> CALLBACK_TYPE:
+        """Recompute day-dependent sensor values at local midnight, without a refresh."""
+
+        @callback
+        def _async_midnight(_now) -> None:
+            if not self.data:
+                return
+            self.changed_fractions = set()
+            self.stale_changed = False
+            self._record_history(self.timeline)
+            self._build_views(self.data)
+            _LOGGER.debug("Midnight rollover changed views: %s", self.changed_views)
+            if self.changed_views:
+                self.async_update_listeners()
+
+        return async_track_time_change(self.hass, _async_midnight, hour=0, minute=0, second=0)
+
+
+class MinRenovasjonBatchCoordinator(DataUpdateCoordinator):
+    """Refresh the addresses of a batch entry together.
+
+    Each address keeps its own MinRenovasjonCoordinator, which its entities
+    listen to, but only this coordinator polls. Addresses are refreshed with
+    bounded concurrency, and a failing address only makes its own entities
+    unavailable. The refresh fails only when every address fails.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        children: list[MinRenovasjonCoordinator],
+        update_interval_hours: int = 24,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        tracer: Tracer | None = None,
+    ) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} batch",
+            update_interval=timedelta(hours=update_interval_hours),
+        )
+        self.children = children
+        self.tracer = tracer if tracer is not None else Tracer(DOMAIN)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def address_coordinators(self) -> list[MinRenovasjonCoordinator]:
+        return self.children
+
+    async def _async_refresh_child(self, child: MinRenovasjonCoordinator) -> bool:
+        async with self._semaphore:
+            await child.async_refresh()
+        return child.last_update_success
+
+    async def _async_update_data(self):
+        # Address updates run as tasks that inherit this span as their parent
+        with self.tracer.span("batch.update") as span:
+            results = await asyncio.gather(
+                *(self._async_refresh_child(child) for child in self.children)
+            )
+            if span:
+                span.set(addresses=len(results), failed=results.count(False))
+        failed = [child.address_name for child, ok in zip(self.children, results) if not ok]
+        if failed and len(failed) == len(self.children):
+            raise UpdateFailed("Failed to refresh every address in the batch")
+        if failed:
+            _LOGGER.warning("Failed to refresh %d of %d addresses: %s", len(failed), len(self.children), failed)
+        return {child.address_key: ok for child, ok in zip(self.children, results)}
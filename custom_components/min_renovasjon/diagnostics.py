@@ -0,0 +1,41 @@
+"""Diagnostics support for Min Renovasjon."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .client import async_get_request_scheduler
+from .const import DOMAIN, CONF_ADDRESS_NAME, CONF_HOUSE_NO, CONF_STREET_CODE, CONF_STREET_NAME
+
+# Single-address entries are titled with the street address, and trace spans
+# carry the address key (municipality, street code and house number)
+TO_REDACT = {
+    "title",
+    CONF_STREET_NAME,
+    CONF_STREET_CODE,
+    CONF_HOUSE_NO,
+    CONF_ADDRESS_NAME,
+    "address",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    # Addresses are listed by position so their names stay redacted
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "request_scheduler": async_get_request_scheduler(hass).as_dict(),
+        "metrics": [
+            address_coordinator.metrics_as_dict()
+            for address_coordinator in (coordinator.address_coordinators if coordinator else [])
+        ],
+        "tracing": (
+            async_redact_data(coordinator.tracer.as_dict(), TO_REDACT) if coordinator else None
+        ),
+    }
@@ -0,0 +1,38 @@
+"""Base entity for Min Renovasjon."""
+from __future__ import annotations
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import MinRenovasjonCoordinator
+
+
+class MinRenovasjonEntity(CoordinatorEntity[MinRenovasjonCoordinator]):
+    """Coordinator entity that only writes state when its data changed."""
+
+    def __init__(self, coordinator: MinRenovasjonCoordinator) -> None:
+        super().__init__(coordinator)
+        self._last_available: bool | None = None
+
+    def _has_changed(self) -> bool:
+        """Return whether the last update changed anything this entity shows."""
+        return bool(self.coordinator.changed_fractions)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        available = self.available
+        if (
+            available == self._last_available
+            and not self.coordinator.stale_changed
+            and not self._has_changed()
+        ):
+            return
+        self._last_available = available
+        with self.coordinator.tracer.span("entity.render") as span:
+            if span:
+                span.set(entity_id=self.entity_id)
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._last_available = self.available
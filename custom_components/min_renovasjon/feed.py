@@ -0,0 +1,73 @@
+"""HTTP view serving each address's collection schedule as an iCalendar feed."""
+from __future__ import annotations
+
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .coordinator import MinRenovasjonCoordinator
+from .ics import CONTENT_TYPE, IcsFeed
+
+FEED_URL = f"/api/{DOMAIN}/feed/{{feed_id}}.ics"
+DATA_FEED_VIEW = f"{DOMAIN}_feed_view"
+
+
+def feed_url(coordinator: MinRenovasjonCoordinator) -> str:
+    """Return the path of the feed served for an address coordinator."""
+    return FEED_URL.format(feed_id=coordinator.unique_id_prefix)
+
+
+@callback
+def async_register_feed_view(hass: HomeAssistant) -> None:
+    """Register the feed view once; it serves every loaded entry."""
+    if hass.data.get(DATA_FEED_VIEW):
+        return
+    hass.http.register_view(MinRenovasjonFeedView())
+    hass.data[DATA_FEED_VIEW] = True
+
+
+def _not_modified(request: web.Request, feed: IcsFeed) -> bool:
+    if (if_none_match := request.headers.get(hdrs.IF_NONE_MATCH)) is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return feed.etag in tags or "*" in tags
+    if (if_modified_since := request.headers.get(hdrs.IF_MODIFIED_SINCE)) is not None:
+        try:
+            return feed.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class MinRenovasjonFeedView(HomeAssistantView):
+    """Serve the pre-rendered feed, or 304 when the client's copy is current."""
+
+    url = FEED_URL
+    name = f"api:{DOMAIN}:feed"
+    requires_auth = True
+
+    async def get(self, request: web.Request, feed_id: str) -> web.Response:
+        hass: HomeAssistant = request.app["hass"]
+        feed = None
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            for address_coordinator in coordinator.address_coordinators:
+                if address_coordinator.unique_id_prefix == feed_id:
+                    feed = address_coordinator.ics_feed
+                    break
+        if feed is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        headers = {
+            hdrs.ETAG: feed.etag,
+            hdrs.LAST_MODIFIED: feed.last_modified_header,
+            hdrs.CACHE_CONTROL: "private, no-cache",
+        }
+        if _not_modified(request, feed):
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        return web.Response(
+            body=feed.body, content_type=CONTENT_TYPE, charset="utf-8", headers=headers
+        )
@@ -0,0 +1,146 @@
+"""Local history of past pickups for Min Renovasjon."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from heapq import merge
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .recurrence import infer_recurrence
+from .schedule import CollectionTimeline, Pickup
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+
+class _FractionHistory:
+    """Sorted, distinct pickup days of one fraction, stored as ordinals."""
+
+    __slots__ = ("name", "days")
+
+    def __init__(self, name: str, days: list[int] | None = None) -> None:
+        self.name = name
+        self.days: list[int] = days if days is not None else []
+
+    def add(self, day: int) -> bool:
+        index = bisect_left(self.days, day)
+        if index < len(self.days) and self.days[index] == day:
+            return False
+        self.days.insert(index, day)
+        return True
+
+    def between(self, start: date, end: date) -> list[int]:
+        return self.days[
+            bisect_left(self.days, start.toordinal()) : bisect_right(self.days, end.toordinal())
+        ]
+
+
+class PickupHistory:
+    """Every past pickup of one address, kept after the API stops returning it.
+
+    Pickups are appended once their day has passed, from whatever timeline
+    was current at the time, so a holiday shift is recorded as it happened.
+    Days are kept sorted per fraction, so range queries bisect and never
+    scan the whole history.
+    """
+
+    def __init__(self, hass: HomeAssistant, history_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.history.{history_id}"
+        )
+        self._fractions: dict[int, _FractionHistory] = {}
+
+    def __len__(self) -> int:
+        return sum(len(fraction.days) for fraction in self._fractions.values())
+
+    async def async_load(self) -> None:
+        try:
+            data = await self._store.async_load()
+            if data:
+                self._fractions = {
+                    int(fraction_id): _FractionHistory(fraction["name"], sorted(set(fraction["days"])))
+                    for fraction_id, fraction in data["fractions"].items()
+                }
+        except Exception as err:
+            # Losing the history only empties past calendar ranges and the
+            # statistics, and recording starts over from the current timeline
+            _LOGGER.warning("Starting a new pickup history, the stored one is unreadable: %s", err)
+            self._fractions = {}
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    @callback
+    def async_record(self, timeline: CollectionTimeline, today: date) -> int:
+        """Append the pickups of `timeline` before `today`, returning how many were new."""
+        added = 0
+        end = timeline.first_on_or_after(today)
+        for index in range(len(timeline) if end is None else end):
+            pickup = timeline[index]
+            if (fraction := self._fractions.get(pickup.fraction_id)) is None:
+                fraction = self._fractions[pickup.fraction_id] = _FractionHistory(
+                    pickup.fraction_name
+                )
+            fraction.name = pickup.fraction_name
+            added += fraction.add(pickup.day.toordinal())
+        if added:
+            _LOGGER.debug("Recorded %d past pickups", added)
+            self._store.async_delay_save(self._serialize, SAVE_DELAY)
+        return added
+
+    def pickups(self, start: date, end: date) -> list[Pickup]:
+        """Return the recorded pickups from `start` to `end`, inclusive, sorted."""
+        return list(
+            merge(
+                *(
+                    [
+                        Pickup(date.fromordinal(day), fraction_id, fraction.name)
+                        for day in fraction.between(start, end)
+                    ]
+                    for fraction_id, fraction in self._fractions.items()
+                )
+            )
+        )
+
+    def statistics(self, start: date, end: date) -> list[dict[str, Any]]:
+        """Summarise each fraction's recorded pickups from `start` to `end`.
+
+        `interval_days` is the inferred collection cycle. Against that cycle,
+        `missed` are days without a pickup and `off_schedule` are pickups on
+        other days; a holiday shift shows up in both.
+        """
+        statistics = []
+        for fraction_id, fraction in sorted(self._fractions.items()):
+            days = [date.fromordinal(day) for day in fraction.between(start, end)]
+            if not days:
+                continue
+            recurrence = infer_recurrence(days)
+            statistics.append(
+                {
+                    "fraction_id": fraction_id,
+                    "fraction_name": fraction.name,
+                    "count": len(days),
+                    "first": days[0].isoformat(),
+                    "last": days[-1].isoformat(),
+                    "interval_days": recurrence.interval if recurrence else None,
+                    "missed": [day.isoformat() for day in recurrence.skipped] if recurrence else [],
+                    "off_schedule": [day.isoformat() for day in recurrence.extra] if recurrence else [],
+                    "dates": [day.isoformat() for day in days],
+                }
+            )
+        return statistics
+
+    def _serialize(self) -> dict[str, Any]:
+        return {
+            "fractions": {
+                str(fraction_id): {"name": fraction.name, "days": list(fraction.days)}
+                for fraction_id, fraction in self._fractions.items()
+            }
+        }
@@ -0,0 +1,174 @@
+"""Local cache of fraction icons, served to the frontend by Home Assistant."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from http import HTTPStatus
+import hashlib
+import logging
+import os
+import re
+from typing import Any
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+
+from .const import DOMAIN
+from .min_renovasjon import MinRenovasjon
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+ICON_URL = f"/api/{DOMAIN}/icons/{{filename}}"
+ICON_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MAX_ICON_SIZE = 512 * 1024
+
+# Icon types kept, by extension. An explicit table, because mimetypes reads
+# system files on first use and that would block the event loop.
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+_EXTENSIONS = {content_type: extension for extension, content_type in CONTENT_TYPES.items()}
+
+# Content hash plus extension, which is all the view will serve
+_FILENAME = re.compile(r"^[0-9a-f]{32}\.(?:%s)$" % "|".join(CONTENT_TYPES))
+
+
+def _write(path: str, body: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(body)
+
+
+def _read(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+class IconCache:
+    """Fraction icons downloaded once per municipality and stored on disk.
+
+    Files are named after a hash of their content, so identical icons are
+    stored once and a served URL never changes meaning. The mapping from
+    remote icon URL to file is kept per municipality in a Store.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.icons")
+        self._directory = hass.config.path(STORAGE_DIR, f"{DOMAIN}_icons")
+        self._icons: dict[str, dict[str, str]] = {}
+        self._bodies: dict[str, bytes] = {}
+        self._load_task: asyncio.Task | None = None
+        self._failed: set[tuple[str, str]] = set()
+
+    async def async_load(self) -> None:
+        """Load the icon index, once, however many entries ask for it."""
+        if self._load_task is None:
+            self._load_task = self._hass.async_create_task(self._async_load())
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        if data := await self._store.async_load():
+            self._icons = data.get("icons", {})
+
+    @callback
+    def local_urls(self, kommunenr: str) -> dict[str, str]:
+        """Return the local URL of every cached icon of a municipality."""
+        return {
+            remote: ICON_URL.format(filename=filename)
+            for remote, filename in self._icons.get(kommunenr, {}).items()
+        }
+
+    async def async_fetch_missing(self, api: MinRenovasjon, urls: Iterable[str]) -> None:
+        """Download the icons of a municipality that are not cached yet.
+
+        Icons are decoration, so a failed download is logged and the sensor
+        keeps the remote URL. It is retried once Home Assistant restarts.
+        """
+        kommunenr = api.kommunenr
+        known = self._icons.get(kommunenr, {})
+        missing = {
+            url for url in urls
+            if url and url not in known and (kommunenr, url) not in self._failed
+        }
+        if not missing:
+            return
+
+        downloaded = await asyncio.gather(
+            *(api.get_icon(url) for url in missing), return_exceptions=True
+        )
+        for url, result in zip(missing, downloaded):
+            if isinstance(result, BaseException):
+                _LOGGER.debug("Could not download icon %s: %s", url, result)
+                self._failed.add((kommunenr, url))
+                continue
+            body, content_type = result
+            extension = _EXTENSIONS.get(content_type)
+            if len(body) > MAX_ICON_SIZE or extension is None:
+                _LOGGER.debug("Ignoring icon %s (%s, %d bytes)", url, content_type, len(body))
+                self._failed.add((kommunenr, url))
+                continue
+            filename = f"{hashlib.sha256(body).hexdigest()[:32]}.{extension}"
+            if filename not in self._bodies:
+                try:
+                    await self._hass.async_add_executor_job(
+                        _write, os.path.join(self._directory, filename), body
+                    )
+                except OSError as err:
+                    _LOGGER.warning("Could not store icon %s: %s", url, err)
+                    self._failed.add((kommunenr, url))
+                    continue
+                self._bodies[filename] = body
+            self._icons.setdefault(kommunenr, {})[url] = filename
+
+        self._store.async_delay_save(lambda: {"icons": self._icons}, SAVE_DELAY)
+
+    async def async_get_body(self, filename: str) -> bytes | None:
+        if not _FILENAME.match(filename):
+            return None
+        if (body := self._bodies.get(filename)) is None:
+            body = await self._hass.async_add_executor_job(
+                _read, os.path.join(self._directory, filename)
+            )
+            if body is not None:
+                self._bodies[filename] = body
+        return body
+
+
+class MinRenovasjonIconView(HomeAssistantView):
+    """Serve cached icons with headers that let clients keep them forever."""
+
+    url = ICON_URL
+    name = f"api:{DOMAIN}:icons"
+    # Loaded by <img> tags, which cannot send a token; icons are public anyway
+    requires_auth = False
+
+    def __init__(self, cache: IconCache) -> None:
+        self._cache = cache
+
+    async def get(self, request: web.Request, filename: str) -> web.Response:
+        if (body := await self._cache.async_get_body(filename)) is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        etag = f'"{filename.partition(".")[0]}"'
+        headers = {hdrs.ETAG: etag, hdrs.CACHE_CONTROL: ICON_CACHE_CONTROL}
+        if request.headers.get(hdrs.IF_NONE_MATCH) == etag:
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        return web.Response(
+            body=body,
+            content_type=CONTENT_TYPES[filename.rpartition(".")[2]],
+            headers=headers,
+        )
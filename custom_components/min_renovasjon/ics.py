@@ -0,0 +1,113 @@
+"""iCalendar rendering of a Min Renovasjon collection timeline."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import hashlib
+
+from .schedule import CollectionTimeline
+
+CONTENT_TYPE = "text/calendar"
+PRODID = "-//actstorms//Min Renovasjon//NO"
+
+_ONE_DAY = timedelta(days=1)
+
+
+@dataclass(frozen=True, slots=True)
+class IcsFeed:
+    """A rendered feed with the validators sent alongside it."""
+
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+    @property
+    def last_modified_header(self) -> str:
+        return format_datetime(self.last_modified, usegmt=True)
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets, as RFC 5545 requires."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte character
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    parts.append(encoded.decode())
+    return "\r\n ".join(parts)
+
+
+def timeline_digest(timeline: CollectionTimeline, name: str) -> str:
+    """Return a digest of what a feed shows, stable across restarts."""
+    text = "\n".join(
+        f"{pickup.day.isoformat()};{pickup.fraction_id};{pickup.fraction_name}"
+        for pickup in timeline
+    )
+    return hashlib.sha256(f"{name}\n{text}".encode()).hexdigest()[:32]
+
+
+def render_ics(
+    timeline: CollectionTimeline,
+    name: str,
+    uid_domain: str,
+    previous: IcsFeed | None = None,
+    now: datetime | None = None,
+) -> IcsFeed:
+    """Render every pickup of `timeline` as an all-day event.
+
+    The ETag is derived from the pickups, so it only changes when the
+    schedule does. When it matches `previous`, that feed is returned as is
+    and keeps its Last-Modified time.
+    """
+    etag = f'"{timeline_digest(timeline, name)}"'
+    if previous is not None and previous.etag == etag:
+        return previous
+
+    # HTTP dates have second precision, so Last-Modified is truncated to match
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(microsecond=0)
+    stamp = now.strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        _fold(f"X-WR-CALNAME:{_escape(name)}"),
+    ]
+    # Fractions repeat on every date, so their summary lines are built once
+    summaries: dict[str, str] = {}
+    for pickup in timeline:
+        day = pickup.day.isoformat().replace("-", "")
+        end = (pickup.day + _ONE_DAY).isoformat().replace("-", "")
+        if (summary := summaries.get(pickup.fraction_name)) is None:
+            summary = summaries[pickup.fraction_name] = _fold(
+                f"SUMMARY:{_escape(pickup.fraction_name)}"
+            )
+        lines += (
+            "BEGIN:VEVENT",
+            _fold(f"UID:{day}-{pickup.fraction_id}@{uid_domain}"),
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{day}",
+            f"DTEND;VALUE=DATE:{end}",
+            summary,
+            "TRANSP:TRANSPARENT",
+            "END:VEVENT",
+        )
+    lines.append("END:VCALENDAR")
+    return IcsFeed(("\r\n".join(lines) + "\r\n").encode(), etag, now)
@@ -0,0 +1,141 @@
+"""Lightweight runtime metrics for the Min Renovasjon client and coordinator."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CPU_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to update on every request."""
+
+    __slots__ = ("_bounds", "_counts", "count", "total", "max", "last")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding quantile `q`."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 4),
+            "p50": round(self.quantile(0.5), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "max": round(self.max, 4),
+            "last": round(self.last, 4),
+            "buckets": {
+                **{f"le_{bound:g}": count for bound, count in zip(self._bounds, self._counts)},
+                "le_inf": self._counts[-1],
+            },
+        }
+
+
+class EndpointMetrics:
+    """Latency, response sizes and failures of one API endpoint."""
+
+    __slots__ = ("latency", "responses", "bytes_total", "bytes_max", "errors", "retries")
+
+    def __init__(self) -> None:
+        self.latency = Histogram()
+        self.responses = 0
+        self.bytes_total = 0
+        self.bytes_max = 0
+        self.errors = 0
+        self.retries = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "latency": self.latency.as_dict(),
+            "responses": self.responses,
+            "bytes_mean": self.bytes_total // self.responses if self.responses else 0,
+            "bytes_max": self.bytes_max,
+            "errors": self.errors,
+            "retries": self.retries,
+        }
+
+
+class ClientMetrics:
+    """Everything one MinRenovasjon client has measured since it was created."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.decode = Histogram(CPU_BUCKETS)
+        self.parse = Histogram(CPU_BUCKETS)
+        self.catalogue_hits = 0
+        self.catalogue_misses = 0
+        self.last_success: datetime | None = None
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        if (metrics := self.endpoints.get(name)) is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def record_response(self, endpoint: str, seconds: float, size: int) -> None:
+        metrics = self.endpoint(endpoint)
+        metrics.latency.observe(seconds)
+        metrics.responses += 1
+        metrics.bytes_total += size
+        if size > metrics.bytes_max:
+            metrics.bytes_max = size
+        self.last_success = datetime.now(timezone.utc)
+
+    def record_catalogue(self, hit: bool) -> None:
+        if hit:
+            self.catalogue_hits += 1
+        else:
+            self.catalogue_misses += 1
+
+    @property
+    def retries(self) -> int:
+        return sum(metrics.retries for metrics in self.endpoints.values())
+
+    @property
+    def latency_p95(self) -> float | None:
+        """Return the p95 latency of the calendar endpoint, the one every refresh uses."""
+        if (metrics := self.endpoints.get("tommekalender")) is None or not metrics.latency.count:
+            return None
+        return metrics.latency.quantile(0.95)
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.catalogue_hits + self.catalogue_misses
+        return {
+            "endpoints": {name: metrics.as_dict() for name, metrics in self.endpoints.items()},
+            "decode": self.decode.as_dict(),
+            "parse": self.parse.as_dict(),
+            "catalogue_hits": self.catalogue_hits,
+            "catalogue_misses": self.catalogue_misses,
+            "catalogue_hit_ratio": round(self.catalogue_hits / lookups, 3) if lookups else None,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+        }
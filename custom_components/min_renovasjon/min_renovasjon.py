@@ -1,8 +1,18 @@
+from __future__ import annotations
+
+import asyncio
+import random
 import aiohttp
 import urllib.parse
 import json
 from datetime import datetime, timedelta
 import logging
+import time
+
+from .metrics import ClientMetrics
+from .parse import FractionCalendar, decode_json, parse_calendar
+from .request_scheduler import CircuitBreaker, RequestScheduler
+from .tracing import Tracer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,20 +29,142 @@ CONST_URL_TOMMEKALENDER = (
 )
 CONST_APP_KEY_VALUE = "AE13DEEC-804F-4615-A74E-B4FAC11F0A30"
 
-class MinRenovasjon:
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+class FractionCatalogue:
+    """Fraction types per municipality, shared between MinRenovasjon instances.
+
+    Concurrent lookups for the same municipality share a single in-flight
+    request, and a failed fetch falls back to the last known catalogue.
+    """
+
+    def __init__(self, ttl=timedelta(hours=24), refetch_interval=timedelta(minutes=10)):
+        self._ttl = ttl
+        self._refetch_interval = refetch_interval
+        self._catalogues = {}
+        self._inflight = {}
+        self._last_forced = {}
+
+    def get(self, kommunenr):
+        """Return the cached catalogue for a municipality regardless of age."""
+        cached = self._catalogues.get(kommunenr)
+        return cached[1] if cached else None
+
+    def is_fresh(self, kommunenr):
+        cached = self._catalogues.get(kommunenr)
+        return cached is not None and datetime.now() - cached[0] < self._ttl
+
+    async def async_get(self, kommunenr, fetch, force=False):
+        """Return the catalogue for a municipality, fetching it when stale.
+
+        `fetch` is a coroutine function returning the raw `fraksjoner` list.
+        Forced refetches are throttled per municipality so a fraction that is
+        genuinely missing upstream does not trigger a request on every refresh.
+        """
+        fraction_types, _ = await self.async_lookup(kommunenr, fetch, force)
+        return fraction_types
+
+    async def async_lookup(self, kommunenr, fetch, force=False):
+        """Like async_get, but also return whether the cache answered without a request."""
+        if force:
+            last_forced = self._last_forced.get(kommunenr)
+            if last_forced and datetime.now() - last_forced < self._refetch_interval:
+                _LOGGER.debug("Skipping fraction refetch for %s, refetched recently", kommunenr)
+                force = False
+            else:
+                self._last_forced[kommunenr] = datetime.now()
+
+        if not force and self.is_fresh(kommunenr):
+            _LOGGER.debug("Using cached fraction types for %s", kommunenr)
+            return self.get(kommunenr), True
 
-    _calendar_list = []
-    _fraction_types = {}
-    _fraction_types_cache = {}
-    _fraction_types_cache_timestamp = None
-    _fraction_types_cache_duration = timedelta(hours=24)
+        task = self._inflight.get(kommunenr)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(kommunenr, fetch))
+            self._inflight[kommunenr] = task
+            task.add_done_callback(lambda _: self._inflight.pop(kommunenr, None))
+        else:
+            _LOGGER.debug("Joining in-flight fraction request for %s", kommunenr)
 
-    def __init__(self, gatenavn, gatekode, husnr, kommunenr, date_format):
+        try:
+            return await asyncio.shield(task), False
+        except Exception as err:
+            cached = self.get(kommunenr)
+            if cached is None:
+                _LOGGER.error("Failed to fetch fraction types and no cache available: %s", err)
+                raise
+            _LOGGER.warning("Failed to fetch fresh fraction types, using cached data: %s", err)
+            return cached, False
+
+    def seed(self, kommunenr, fraction_types, fetched_at):
+        """Prime the cache with a previously fetched catalogue unless a newer one exists."""
+        cached = self._catalogues.get(kommunenr)
+        if cached is None or cached[0] < fetched_at:
+            self._catalogues[kommunenr] = (fetched_at, fraction_types)
+
+    def fetched_at(self, kommunenr):
+        cached = self._catalogues.get(kommunenr)
+        return cached[0] if cached else None
+
+    async def _fetch(self, kommunenr, fetch):
+        fractions_data = await fetch()
+        fraction_types = {
+            fraction['Id']: fraction
+            for fraction in fractions_data
+        }
+        self._catalogues[kommunenr] = (datetime.now(), fraction_types)
+        _LOGGER.debug("Fraction types for %s cached successfully", kommunenr)
+        return fraction_types
+
+
+class MinRenovasjon:
+
+    def __init__(self, session: aiohttp.ClientSession, gatenavn, gatekode, husnr, kommunenr, date_format,
+                 catalogue: FractionCatalogue | None = None, scheduler: RequestScheduler | None = None,
+                 tracer: Tracer | None = None):
+        self._session = session
         self._gatenavn = self._url_encode(gatenavn)
         self._gatekode = gatekode
         self._husnr = husnr
         self._kommunenr = kommunenr
         self._date_format = date_format
+        self._catalogue = catalogue if catalogue is not None else FractionCatalogue()
+        self._scheduler = scheduler
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.metrics = ClientMetrics()
+        self.tracer = tracer if tracer is not None else Tracer(kommunenr)
+        self._fraction_types = self._catalogue.get(kommunenr) or {}
+        self._calendar_list: list[FractionCalendar] = []
+        self._calendar_index: dict[int, FractionCalendar] = {}
+
+    @property
+    def kommunenr(self):
+        return self._kommunenr
+
+    @property
+    def catalogue(self):
+        return self._catalogue
+
+    @property
+    def fraction_types(self):
+        return self._fraction_types
+
+    @property
+    def calender_list(self) -> list[FractionCalendar]:
+        return self._calendar_list
+
+    @calender_list.setter
+    def calender_list(self, calendar_list: list[FractionCalendar]) -> None:
+        self._calendar_list = calendar_list
+        self._calendar_index = {entry.fraction_id: entry for entry in calendar_list}
+
+    def restore(self, fraction_types, calendar_list):
+        """Load a previously fetched catalogue and calendar without any requests."""
+        if fraction_types:
+            self._fraction_types = fraction_types
+        self.calender_list = calendar_list
 
     @staticmethod
     def _url_encode(string):
@@ -46,8 +178,7 @@ class MinRenovasjon:
             _LOGGER.debug("Starting calendar refresh")
             self.calender_list = await self._get_calendar_list()
             _LOGGER.debug("Calendar refresh completed successfully")
-            _LOGGER.debug("Calendar list: %s", self.calender_list)
-        except aiohttp.ClientError as err:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
             _LOGGER.error("Failed to connect to Min Renovasjon API: %s", err)
             raise ConnectionError(f"Failed to connect to Min Renovasjon API: {err}") from err
         except json.JSONDecodeError as err:
@@ -57,47 +188,89 @@ class MinRenovasjon:
             _LOGGER.error("Unexpected error occurred: %s", err)
             raise
 
+    @staticmethod
+    def _is_retryable(err):
+        if isinstance(err, aiohttp.ClientResponseError):
+            return err.status == 429 or err.status >= 500
+        return isinstance(err, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    @staticmethod
+    def _endpoint(url):
+        return "fraksjoner" if url == CONST_URL_FRAKSJONER else "tommekalender"
+
+    def _breaker(self, url):
+        endpoint = self._endpoint(url)
+        if self._scheduler is not None:
+            return self._scheduler.breaker(endpoint)
+        if (breaker := self._breakers.get(endpoint)) is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker()
+        return breaker
+
     async def _get_from_web_api(self, url):
+        """Fetch a URL, retrying transient failures with jittered exponential backoff."""
+        breaker = self._breaker(url)
+        for attempt in range(RETRY_ATTEMPTS):
+            probe = breaker.before_request()
+            try:
+                if self._scheduler is None:
+                    data = await self._fetch(url)
+                else:
+                    data = await self._scheduler.request((url, self._kommunenr), lambda: self._fetch(url))
+            except Exception as err:
+                endpoint = self.metrics.endpoint(self._endpoint(url))
+                endpoint.errors += 1
+                if not self._is_retryable(err):
+                    # The endpoint answered, so it is up even if the request was bad
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt == RETRY_ATTEMPTS - 1:
+                    raise
+                endpoint.retries += 1
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.5)
+                _LOGGER.debug("Request failed (%s), retrying in %.1fs", err, delay)
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled mid-request: neither a success nor a failure, but a
+                # half-open probe must not stay claimed forever
+                if probe:
+                    breaker.release_probe()
+                raise
+            else:
+                breaker.record_success()
+                return data
+
+    async def _fetch(self, url):
         header = {
             CONST_KOMMUNE_NUMMER: self._kommunenr,
             CONST_APP_KEY: CONST_APP_KEY_VALUE,
         }
         _LOGGER.debug("Requesting URL: %s", url)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=header, timeout=10) as response:
+        with self.tracer.span("api.fetch") as span:
+            started = time.perf_counter()
+            async with self._session.get(url, headers=header) as response:
                 _LOGGER.debug("API response status code: %s", response.status)
+                if span:
+                    span.set(endpoint=self._endpoint(url), status=response.status)
                 response.raise_for_status()
-                return await response.json(content_type=None)
+                body = await response.read()
+            received = time.perf_counter()
+            self.metrics.record_response(self._endpoint(url), received - started, len(body))
+            data = decode_json(body)
+            self.metrics.decode.observe(time.perf_counter() - received)
+            if span:
+                span.set(bytes=len(body), decode_ms=round((time.perf_counter() - received) * 1000, 3))
+        return data
 
-    async def get_fraction_types(self):
+    async def get_fraction_types(self, force=False):
         _LOGGER.debug("Fetching fractions")
-        
-        # Check if we have cached fraction types and they're still valid
-        if self._fraction_types and self._fraction_types_cache_timestamp:
-            if datetime.now() - self._fraction_types_cache_timestamp < self._fraction_types_cache_duration:
-                _LOGGER.debug("Using cached fraction types")
-                self._fraction_types = self._fraction_types_cache
-                return
-        
-        # Fetch fresh data if cache is invalid or empty
-        try:
-            fractions_data = await self._get_from_web_api(CONST_URL_FRAKSJONER)
-            self._fraction_types = {
-                fraction['Id']: fraction
-                for fraction in fractions_data
-            }
-            # Update cache
-            self._fraction_types_cache = self._fraction_types.copy()
-            self._fraction_types_cache_timestamp = datetime.now()
-            _LOGGER.debug("Fraction types cached successfully")
-        except Exception as err:
-            # If API call fails but we have cached data, use it
-            if self._fraction_types_cache:
-                _LOGGER.warning("Failed to fetch fresh fraction types, using cached data: %s", err)
-                self._fraction_types = self._fraction_types_cache
-            else:
-                _LOGGER.error("Failed to fetch fraction types and no cache available: %s", err)
-                raise
+        self._fraction_types, hit = await self._catalogue.async_lookup(
+            self._kommunenr,
+            lambda: self._get_from_web_api(CONST_URL_FRAKSJONER),
+            force=force,
+        )
+        # A throttled forced refetch is served from the cache and counts as a hit
+        self.metrics.record_catalogue(hit)
 
     def get_fraction_name(self, fraction_id):
         return self._fraction_types.get(int(fraction_id), {}).get("Navn", f"Unknown fraction {fraction_id}")
@@ -105,54 +278,58 @@ class MinRenovasjon:
     def get_fraction_icon(self, fraction_id):
         return self._fraction_types.get(int(fraction_id), {}).get("Ikon", "")
 
+    async def get_icon(self, url):
+        """Download a fraction icon, returning its bytes and content type."""
+        if url.startswith("http://"):
+            url = url.replace("http://", "https://", 1)
+
+        async def _download():
+            async with self._session.get(url) as response:
+                response.raise_for_status()
+                return await response.read(), response.content_type
+
+        if self._scheduler is None:
+            return await _download()
+        return await self._scheduler.request((url, self._kommunenr), _download)
+
     async def _get_calendar_list(self):
         url = CONST_URL_TOMMEKALENDER.replace("[kommunenr]", self._kommunenr)
         url = url.replace("[gatenavn]", self._gatenavn)
         url = url.replace("[gatekode]", self._gatekode)
         url = url.replace("[husnr]", self._husnr)
 
-        data = await self._get_from_web_api(url)
-        _LOGGER.debug("Received calendar data: %s", json.dumps(data, indent=2))
+        # The catalogue is usually cached; when it is not, fetch both at once
+        _, data = await asyncio.gather(
+            self.get_fraction_types(),
+            self._get_from_web_api(url),
+        )
 
-        calendar_list = []
-        for entry in data:
-            try:
-                fraction_id = entry["FraksjonId"]
-                fraction_name = self.get_fraction_name(fraction_id)
-                icon = self.get_fraction_icon(fraction_id)
-                
-                pickup_dates = entry.get('Tommedatoer', [])
-                next_pickup = datetime.strptime(pickup_dates[0], "%Y-%m-%dT%H:%M:%S") if pickup_dates else None
-                next_next_pickup = datetime.strptime(pickup_dates[1], "%Y-%m-%dT%H:%M:%S") if len(pickup_dates) > 1 else None
-
-                calendar_entry = (
-                    fraction_id,
-                    fraction_name,
-                    icon,
-                    next_pickup,
-                    next_next_pickup
+        # Malformed entries are left for parse_calendar to skip and log
+        unknown = {
+            entry.get("FraksjonId") for entry in data if isinstance(entry, dict)
+        } - self._fraction_types.keys() - {None}
+        if unknown:
+            _LOGGER.debug("Unknown fractions %s, refetching fraction types", unknown)
+            await self.get_fraction_types(force=True)
+
+        with self.tracer.span("calendar.parse") as span:
+            started = time.perf_counter()
+            calendar_list = parse_calendar(data, self._fraction_types)
+            self.metrics.parse.observe(time.perf_counter() - started)
+            if span:
+                span.set(
+                    fractions=len(calendar_list),
+                    pickups=sum(len(entry.pickup_dates) for entry in calendar_list),
                 )
-                calendar_list.append(calendar_entry)
-                _LOGGER.debug("Processed calendar entry: %s", calendar_entry)
-            except KeyError as e:
-                _LOGGER.error(f"KeyError processing entry: {e}. Entry data: {entry}")
-            except Exception as e:
-                _LOGGER.error(f"Error processing entry: {e}. Entry data: {entry}")
-
-        _LOGGER.debug("Processed %d calendar entries", len(calendar_list))
         return calendar_list
 
-    def get_calender_for_fraction(self, fraksjon_id):
-        for entry in self.calender_list:
-            if entry[0] == int(fraksjon_id):
-                _LOGGER.debug("Found calendar entry for fraction %s: %s", fraksjon_id, entry)
-                return entry
-        _LOGGER.warning("No calendar entry found for fraction %s", fraksjon_id)
-        return None
+    def get_calender_for_fraction(self, fraksjon_id) -> FractionCalendar | None:
+        entry = self._calendar_index.get(int(fraksjon_id))
+        if entry is None:
+            _LOGGER.warning("No calendar entry found for fraction %s", fraksjon_id)
+        return entry
 
     def format_date(self, date):
         if self._date_format == "None" or date is None:
             return date
-        formatted_date = date.strftime(self._date_format)
-        _LOGGER.debug("Formatted date %s to %s", date, formatted_date)
-        return formatted_date
+        return date.strftime(self._date_format)
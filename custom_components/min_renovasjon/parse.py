@@ -0,0 +1,87 @@
+"""Parse stage for Min Renovasjon API responses."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from functools import lru_cache
+import json
+import logging
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    orjson = None
+
+from .recurrence import Recurrence, infer_recurrence
+
+_LOGGER = logging.getLogger(__name__)
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+@dataclass(frozen=True, slots=True)
+class FractionCalendar:
+    """Scheduled pickups of one fraction at one address."""
+
+    fraction_id: int
+    name: str
+    icon: str
+    pickup_dates: tuple[datetime, ...]
+    # Inferred from pickup_dates; predicts pickups after the last one
+    recurrence: Recurrence | None = None
+
+    @property
+    def next_pickup(self) -> datetime | None:
+        return self.pickup_dates[0] if self.pickup_dates else None
+
+    @property
+    def next_next_pickup(self) -> datetime | None:
+        return self.pickup_dates[1] if len(self.pickup_dates) > 1 else None
+
+    def upcoming(self, day: date) -> tuple[datetime, ...]:
+        """Return the pickups on or after `day`."""
+        return self.pickup_dates[bisect_left(self.pickup_dates, datetime.combine(day, time.min)):]
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode a response body, with orjson when it is installed.
+
+    Both backends raise a json.JSONDecodeError subclass on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+@lru_cache(maxsize=4096)
+def parse_pickup_date(value: str) -> datetime:
+    """Parse a `Tommedatoer` timestamp such as 2026-01-05T00:00:00.
+
+    Addresses in a municipality share pickup days, so the same strings come
+    back over and over; the cache turns most of them into a dict lookup.
+    """
+    return datetime.fromisoformat(value)
+
+
+def parse_calendar(data: list[dict[str, Any]], fraction_types: dict[int, dict[str, Any]]) -> list[FractionCalendar]:
+    """Join a `tommekalender` response with the fraction catalogue in one pass."""
+    calendar_list = []
+    for entry in data:
+        try:
+            fraction_id = entry["FraksjonId"]
+            fraction = fraction_types.get(fraction_id)
+            if fraction is None:
+                name, icon = f"Unknown fraction {fraction_id}", ""
+            else:
+                name, icon = fraction.get("Navn", f"Unknown fraction {fraction_id}"), fraction.get("Ikon", "")
+            pickup_dates = tuple(sorted(map(parse_pickup_date, entry.get("Tommedatoer") or ())))
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.error("Error processing entry: %s. Entry data: %s", err, entry)
+            continue
+        recurrence = infer_recurrence(sorted({pickup.date() for pickup in pickup_dates}))
+        calendar_list.append(FractionCalendar(fraction_id, name, icon, pickup_dates, recurrence))
+
+    _LOGGER.debug("Processed %d calendar entries", len(calendar_list))
+    return calendar_list
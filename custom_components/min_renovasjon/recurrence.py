@@ -0,0 +1,100 @@
+"""Recurrence rules inferred from the pickup dates of a fraction."""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+# Schedules repeat every whole number of weeks, up to every eight weeks
+MAX_INTERVAL_WEEKS = 8
+
+
+@dataclass(frozen=True, slots=True)
+class Recurrence:
+    """A fixed interval from `anchor`, with the deviations seen up to `until`.
+
+    `skipped` are rule dates without a pickup and `extra` are pickups off the
+    rule, typically the two halves of a holiday shift. Together with the rule
+    they reproduce the observed dates exactly; after `until` only the rule
+    is known, so those dates are predictions.
+    """
+
+    anchor: date
+    interval: int
+    until: date
+    skipped: tuple[date, ...] = ()
+    extra: tuple[date, ...] = ()
+
+    def _rule(self, start: date, end: date) -> Iterator[date]:
+        offset = max(0, -(-(start - self.anchor).days // self.interval))
+        day = self.anchor + timedelta(days=offset * self.interval)
+        step = timedelta(days=self.interval)
+        while day <= end:
+            yield day
+            day += step
+
+    def observed(self) -> list[date]:
+        """Return the dates the rule was inferred from."""
+        skipped = set(self.skipped)
+        days = [day for day in self._rule(self.anchor, self.until) if day not in skipped]
+        return sorted(days + list(self.extra))
+
+    def predict(self, start: date, end: date) -> Iterator[date]:
+        """Yield the predicted pickups from `start` to `end`, after `until`."""
+        return self._rule(max(start, self.until + timedelta(days=1)), end)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "anchor": self.anchor.isoformat(),
+            "interval": self.interval,
+            "until": self.until.isoformat(),
+            "skipped": [day.isoformat() for day in self.skipped],
+            "extra": [day.isoformat() for day in self.extra],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Recurrence:
+        return cls(
+            date.fromisoformat(data["anchor"]),
+            data["interval"],
+            date.fromisoformat(data["until"]),
+            tuple(map(date.fromisoformat, data["skipped"])),
+            tuple(map(date.fromisoformat, data["extra"])),
+        )
+
+
+def infer_recurrence(days: Sequence[date]) -> Recurrence | None:
+    """Infer a weekly-based rule from sorted, distinct pickup dates.
+
+    Returns None when there are too few dates or when more than a third of
+    them would have to be exceptions, so irregular schedules are never
+    extrapolated.
+    """
+    if len(days) < 2:
+        return None
+
+    gaps = Counter(
+        gap
+        for first, second in zip(days, days[1:])
+        if (gap := (second - first).days) % 7 == 0 and 0 < gap <= MAX_INTERVAL_WEEKS * 7
+    )
+    if not gaps:
+        return None
+    # The most common gap; on a tie, the shorter one
+    interval = min(gaps, key=lambda gap: (-gaps[gap], gap))
+
+    # Anchor on the weekday phase most dates share
+    phase = Counter(day.toordinal() % interval for day in days).most_common(1)[0][0]
+    anchor = next(day for day in days if day.toordinal() % interval == phase)
+    until = days[-1]
+
+    recurrence = Recurrence(anchor, interval, until)
+    rule = set(recurrence._rule(anchor, until))
+    observed = set(days)
+    skipped = tuple(sorted(rule - observed))
+    extra = tuple(sorted(observed - rule))
+    if len(skipped) + len(extra) > len(days) // 3:
+        return None
+    return Recurrence(anchor, interval, until, skipped, extra)
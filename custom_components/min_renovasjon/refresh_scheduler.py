@@ -0,0 +1,94 @@
+"""Pickup-aware adaptive refresh planning for Min Renovasjon."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+import hashlib
+from typing import Any
+
+
+class AdaptiveRefreshScheduler:
+    """Plan each refresh from the schedule instead of a fixed interval.
+
+    While consecutive responses are identical the interval doubles, up to
+    `max_interval`. Shortly before the next known pickup, when holiday changes
+    matter most, it drops to `pre_pickup_interval`. A deterministic per-entry
+    jitter keeps many entries from hitting the proxy at the same moment.
+    """
+
+    def __init__(
+        self,
+        base_interval: timedelta,
+        seed: str,
+        min_interval: timedelta = timedelta(hours=1),
+        max_interval: timedelta = timedelta(days=7),
+        pre_pickup_window: timedelta = timedelta(hours=36),
+        pre_pickup_interval: timedelta = timedelta(hours=6),
+        jitter: float = 0.1,
+    ) -> None:
+        self._base_interval = base_interval
+        self._min_interval = min_interval
+        self._max_interval = max(max_interval, base_interval)
+        self._pre_pickup_window = pre_pickup_window
+        self._pre_pickup_interval = pre_pickup_interval
+        # Map the seed onto [-jitter, +jitter] so each entry keeps its own offset
+        digest = int(hashlib.sha1(seed.encode()).hexdigest()[:8], 16)
+        self._jitter = (digest / 0xFFFFFFFF * 2 - 1) * jitter
+
+        self._started: datetime | None = None
+        self._last_refresh: datetime | None = None
+        self.refreshes = 0
+        self.unchanged_streak = 0
+        self.interval = base_interval
+        self.next_refresh: datetime | None = None
+        self.reason = "initial"
+
+    def plan(self, changed: bool, next_pickup: date | None, now: datetime) -> timedelta:
+        """Record a successful refresh and return the delay until the next one."""
+        if self._started is None:
+            self._started = now
+        self._last_refresh = now
+        self.refreshes += 1
+        self.unchanged_streak = 0 if changed else self.unchanged_streak + 1
+
+        interval = min(self._base_interval * 2 ** self.unchanged_streak, self._max_interval)
+        self.reason = "backoff" if self.unchanged_streak else "changed"
+
+        if next_pickup is not None:
+            until_pickup = datetime.combine(next_pickup, time.min, tzinfo=now.tzinfo) - now
+            if until_pickup <= self._pre_pickup_window:
+                if self._pre_pickup_interval < interval:
+                    interval = self._pre_pickup_interval
+                    self.reason = "pre_pickup"
+            elif until_pickup - self._pre_pickup_window < interval:
+                # Wake up when the pre-pickup window opens rather than sleep past it
+                interval = until_pickup - self._pre_pickup_window
+                self.reason = "pre_pickup_window"
+
+        interval = max(interval * (1 + self._jitter), self._min_interval)
+        self.interval = interval
+        self.next_refresh = now + interval
+        return interval
+
+    @property
+    def calls_saved(self) -> int:
+        """Refreshes avoided compared with polling at the fixed base interval.
+
+        Both schedules start with the same initial refresh and are compared
+        up to the last refresh that actually ran.
+        """
+        if self._started is None or self._last_refresh is None:
+            return 0
+        fixed_refreshes = 1 + int((self._last_refresh - self._started) / self._base_interval)
+        # Refreshing more often before a pickup is not a negative saving
+        return max(0, fixed_refreshes - self.refreshes)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "refresh_mode": "adaptive",
+            "refresh_reason": self.reason,
+            "refresh_interval_hours": round(self.interval.total_seconds() / 3600, 2),
+            "next_refresh": self.next_refresh.isoformat() if self.next_refresh else None,
+            "unchanged_refreshes": self.unchanged_streak,
+            "refreshes": self.refreshes,
+            "refreshes_saved": self.calls_saved,
+        }
@@ -0,0 +1,177 @@
+"""Collection reminders fired as events from the cached schedule."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+import heapq
+import logging
+from typing import NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+from .const import EVENT_REMINDER
+from .coordinator import MinRenovasjonCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Reminder(NamedTuple):
+    at: datetime
+    day: date
+    fraction_id: int
+    fraction_name: str
+    offset: timedelta
+    address_name: str | None
+
+
+def parse_offsets(value: str) -> tuple[timedelta, ...]:
+    """Parse comma separated hours before the pickup day, such as "4, 28".
+
+    Raises ValueError for anything that is not a number of hours from 0 to
+    168. An empty string disables reminders.
+    """
+    offsets = set()
+    for part in value.split(","):
+        if not (part := part.strip()):
+            continue
+        hours = float(part)
+        if not 0 <= hours <= 168:
+            raise ValueError(f"Reminder offset out of range: {part}")
+        offsets.add(timedelta(hours=hours))
+    return tuple(sorted(offsets))
+
+
+def build_reminders(
+    coordinator: MinRenovasjonCoordinator,
+    offsets: tuple[timedelta, ...],
+    now: datetime,
+) -> list[Reminder]:
+    """Return the reminders of one address that are still due, in order."""
+    timeline = coordinator.timeline
+    # Pickups before today have no reminders left
+    first = timeline.first_on_or_after(now.date())
+    if first is None or not offsets:
+        return []
+
+    reminders = []
+    for index in range(first, len(timeline)):
+        pickup = timeline[index]
+        start = dt_util.start_of_local_day(pickup.day)
+        for offset in offsets:
+            if (at := start - offset) > now:
+                reminders.append(
+                    Reminder(
+                        at,
+                        pickup.day,
+                        pickup.fraction_id,
+                        pickup.fraction_name,
+                        offset,
+                        coordinator.address_name,
+                    )
+                )
+    reminders.sort()
+    return reminders
+
+
+class ReminderScheduler:
+    """Fire an event for every upcoming pickup at the configured offsets.
+
+    Reminders for all addresses of an entry are computed when a coordinator
+    publishes a new schedule, and a single timer is armed for the earliest
+    one. Nothing runs between reminders.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        coordinators: list[MinRenovasjonCoordinator],
+        offsets: tuple[timedelta, ...],
+    ) -> None:
+        self._hass = hass
+        self._entry_id = entry_id
+        self._coordinators = coordinators
+        self._offsets = offsets
+        self._reminders: list[Reminder] = []
+        self._generations: tuple[int, ...] = ()
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def next_reminder(self) -> Reminder | None:
+        return self._reminders[0] if self._reminders else None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Plan reminders now and after every refresh; return a stop callback."""
+        unsubs = [
+            coordinator.async_add_listener(self._async_coordinator_updated)
+            for coordinator in self._coordinators
+        ]
+        self._async_plan()
+
+        @callback
+        def _async_stop() -> None:
+            for unsub in unsubs:
+                unsub()
+            self._cancel_timer()
+
+        return _async_stop
+
+    @callback
+    def _async_coordinator_updated(self) -> None:
+        # Listeners are also called when nothing changed, e.g. while stale
+        generations = tuple(coordinator.timeline.generation for coordinator in self._coordinators)
+        if generations != self._generations:
+            self._async_plan()
+
+    @callback
+    def _async_plan(self) -> None:
+        now = dt_util.now()
+        self._generations = tuple(
+            coordinator.timeline.generation for coordinator in self._coordinators
+        )
+        self._reminders = list(
+            heapq.merge(
+                *(
+                    build_reminders(coordinator, self._offsets, now)
+                    for coordinator in self._coordinators
+                )
+            )
+        )
+        _LOGGER.debug("Planned %d reminders, next %s", len(self._reminders), self.next_reminder)
+        self._arm()
+
+    def _cancel_timer(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    def _arm(self) -> None:
+        self._cancel_timer()
+        if self._reminders:
+            self._unsub_timer = async_track_point_in_time(
+                self._hass, self._async_fire_due, self._reminders[0].at
+            )
+
+    @callback
+    def _async_fire_due(self, now: datetime) -> None:
+        self._unsub_timer = None
+        due = 0
+        while due < len(self._reminders) and self._reminders[due].at <= now:
+            reminder = self._reminders[due]
+            self._hass.bus.async_fire(
+                EVENT_REMINDER,
+                {
+                    "entry_id": self._entry_id,
+                    "address": reminder.address_name,
+                    "fraction_id": reminder.fraction_id,
+                    "fraction_name": reminder.fraction_name,
+                    "date": reminder.day.isoformat(),
+                    "days_until": (reminder.day - dt_util.as_local(now).date()).days,
+                    "offset_hours": reminder.offset.total_seconds() / 3600,
+                },
+            )
+            due += 1
+        del self._reminders[:due]
+        self._arm()
@@ -0,0 +1,213 @@
+"""Process-wide scheduling of Min Renovasjon API requests."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from contextvars import ContextVar
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Priority of requests made from the current task; coordinators lower it for
+# periodic refreshes so first refreshes and config flows go first
+REQUEST_PRIORITY: ContextVar[int] = ContextVar(
+    "min_renovasjon_request_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending a request to an endpoint that keeps failing."""
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint after repeated failures, then probe it again.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail immediately. Once `reset_timeout` has passed, a single
+    probe request is let through; success closes the circuit, failure opens
+    it again with a doubled timeout, up to `max_reset_timeout`. A probe that
+    never reports back within `probe_timeout` no longer blocks the next one.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        max_reset_timeout: float = 1800.0,
+        probe_timeout: float = 120.0,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._base_reset_timeout = reset_timeout
+        self._max_reset_timeout = max_reset_timeout
+        self._reset_timeout = reset_timeout
+        self._probe_timeout = probe_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._probe_started = 0.0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self._opened_at >= self._reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError unless a request may be sent now.
+
+        Returns True when the request is the half-open probe.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "open" or (
+            self._probing and time.monotonic() - self._probe_started < self._probe_timeout
+        ):
+            raise CircuitOpenError("Circuit open after repeated failures")
+        self._probing = True
+        self._probe_started = time.monotonic()
+        return True
+
+    def release_probe(self) -> None:
+        """Let another probe through after one ended without a result, e.g. cancelled."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._reset_timeout = self._base_reset_timeout
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing:
+            self._reset_timeout = min(self._reset_timeout * 2, self._max_reset_timeout)
+            self._opened_at = time.monotonic()
+        elif self._opened_at is None and self.failures >= self._failure_threshold:
+            _LOGGER.warning("Opening circuit after %d consecutive failures", self.failures)
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "reset_timeout": self._reset_timeout,
+        }
+
+
+class RequestScheduler:
+    """Rate-limit, prioritise and coalesce requests to the Min Renovasjon API.
+
+    A token bucket admits `rate` requests per second with bursts of up to
+    `burst`. Waiting requests are released in priority order. A request whose
+    key matches one already in flight waits for that one instead of being sent.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: int = 10, wait_samples: int = 200) -> None:
+        self._rate = rate
+        self._capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._sequence = itertools.count()
+        self._queue: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._dispatch_handle: asyncio.TimerHandle | None = None
+        self._inflight: dict[Hashable, asyncio.Future[Any]] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+        self.requests = 0
+        self.coalesced = 0
+        self.max_queue_depth = 0
+        self._waits: deque[float] = deque(maxlen=wait_samples)
+
+    async def request(self, key: Hashable, fetch: Callable[[], Awaitable[_T]]) -> _T:
+        """Run `fetch` when the bucket allows it, sharing it with identical requests."""
+        if (task := self._inflight.get(key)) is not None:
+            self.coalesced += 1
+            _LOGGER.debug("Coalescing request %s", key)
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(self._run(fetch, REQUEST_PRIORITY.get()))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _run(self, fetch: Callable[[], Awaitable[_T]], priority: int) -> _T:
+        await self._acquire(priority)
+        self.requests += 1
+        return await fetch()
+
+    async def _acquire(self, priority: int) -> None:
+        start = time.monotonic()
+        self._refill()
+        if not self._queue and self._tokens >= 1:
+            self._tokens -= 1
+            self._waits.append(0.0)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        self._schedule_dispatch()
+        await waiter
+        self._waits.append(time.monotonic() - start)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _schedule_dispatch(self) -> None:
+        if self._dispatch_handle is None and self._queue:
+            delay = max(0.0, (1 - self._tokens) / self._rate)
+            self._dispatch_handle = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._dispatch_handle = None
+        self._refill()
+        while self._queue and self._tokens >= 1:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.done():  # Cancelled while queued
+                continue
+            self._tokens -= 1
+            waiter.set_result(None)
+        self._schedule_dispatch()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """Return the circuit breaker shared by all requests to `endpoint`."""
+        if (breaker := self._breakers.get(endpoint)) is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker()
+        return breaker
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def as_dict(self) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": len(self._inflight),
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "tokens": round(self._tokens, 2),
+            "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+            "circuit_breakers": {
+                endpoint: breaker.as_dict() for endpoint, breaker in self._breakers.items()
+            },
+        }
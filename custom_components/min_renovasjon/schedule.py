@@ -0,0 +1,85 @@
+"""Sorted timeline of every known pickup for Min Renovasjon."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from datetime import date
+from typing import NamedTuple
+
+
+class Pickup(NamedTuple):
+    day: date
+    fraction_id: int
+    fraction_name: str
+    # Expanded from the fraction's recurrence, not returned by the API
+    predicted: bool = False
+
+
+class CollectionTimeline:
+    """All pickups of one calendar, sorted by date and built once per refresh.
+
+    Range lookups bisect over a parallel list of days, so they cost
+    O(log n + k) no matter how many fractions or dates the calendar holds.
+    """
+
+    __slots__ = ("generation", "_days", "_pickups", "_recurrences")
+
+    def __init__(self, calendar_list, generation: int = 0) -> None:
+        self.generation = generation
+        pickups = {
+            Pickup(pickup_date.date(), entry.fraction_id, entry.name)
+            for entry in calendar_list
+            for pickup_date in entry.pickup_dates
+        }
+        self._pickups: tuple[Pickup, ...] = tuple(sorted(pickups))
+        self._days: tuple[date, ...] = tuple(pickup.day for pickup in self._pickups)
+        self._recurrences = tuple(
+            (entry.fraction_id, entry.name, entry.recurrence)
+            for entry in calendar_list
+            if entry.recurrence is not None
+        )
+
+    def __len__(self) -> int:
+        return len(self._pickups)
+
+    def __getitem__(self, index: int) -> Pickup:
+        return self._pickups[index]
+
+    def __iter__(self) -> Iterator[Pickup]:
+        return iter(self._pickups)
+
+    def index_range(self, start: date, end: date) -> range:
+        """Return the indices of the pickups from `start` to `end`, inclusive."""
+        return range(bisect_left(self._days, start), bisect_right(self._days, end))
+
+    def first_on_or_after(self, day: date) -> int | None:
+        """Return the index of the first pickup on or after `day`."""
+        index = bisect_left(self._days, day)
+        return index if index < len(self._days) else None
+
+    def predicted_range(self, start: date, end: date) -> list[Pickup]:
+        """Return the predicted pickups from `start` to `end`, inclusive.
+
+        Predictions only begin after each fraction's last known pickup and
+        are expanded on every call, so any range costs no memory up front.
+        """
+        return sorted(
+            Pickup(day, fraction_id, name, True)
+            for fraction_id, name, recurrence in self._recurrences
+            for day in recurrence.predict(start, end)
+        )
+
+    def first_predicted_on_or_after(self, day: date) -> Pickup | None:
+        """Return the earliest predicted pickup on or after `day`."""
+        candidates = (
+            (next(recurrence.predict(day, date.max), None), fraction_id, name)
+            for fraction_id, name, recurrence in self._recurrences
+        )
+        return min(
+            (
+                Pickup(predicted_day, fraction_id, name, True)
+                for predicted_day, fraction_id, name in candidates
+                if predicted_day is not None
+            ),
+            default=None,
+        )
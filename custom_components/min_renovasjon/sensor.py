@@ -1,142 +1,193 @@
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import datetime
-from homeassistant.components.sensor import SensorEntity
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
-from .coordinator import MinRenovasjonCoordinator
+from .coordinator import (
+    NEXT_COLLECTION_VIEW,
+    MinRenovasjonBatchCoordinator,
+    MinRenovasjonCoordinator,
+)
+from .entity import MinRenovasjonEntity
+from .views import STATE_UNKNOWN, SensorView
 
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
-class MinRenovasjonNextCollectionSensor(CoordinatorEntity, SensorEntity):
+MISSING_VIEW = SensorView(STATE_UNKNOWN)
+
+class MinRenovasjonNextCollectionSensor(MinRenovasjonEntity, SensorEntity):
+    _unrecorded_attributes = frozenset({
+        "days_until",
+        "refresh_reason",
+        "refresh_interval_hours",
+        "next_refresh",
+        "unchanged_refreshes",
+        "refreshes",
+        "refreshes_saved",
+    })
+
     def __init__(self, coordinator: MinRenovasjonCoordinator) -> None:
         super().__init__(coordinator)
-        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_next_collection"
-        self._attr_name = "Min Renovasjon Next Collection"
+        self._attr_unique_id = f"{coordinator.unique_id_prefix}_next_collection"
+        self._attr_name = f"{coordinator.entity_name_prefix} Next Collection"
+
+    def _has_changed(self) -> bool:
+        # The scheduler attributes move on every refresh in adaptive mode
+        return (
+            NEXT_COLLECTION_VIEW in self.coordinator.changed_views
+            or self.coordinator.refresh_scheduler is not None
+        )
 
     @property
     def state(self) -> str:
-        try:
-            next_collections = {}
-            for fraction_id in self.coordinator.fractions:
-                fraction_data = self.coordinator.data.get(fraction_id)
-                if not fraction_data or len(fraction_data) <= 3 or not fraction_data[3]:
-                    continue
-                
-                collection_date = fraction_data[3]
-                if not isinstance(collection_date, datetime):
-                    continue
-                    
-                date_str = collection_date.date().isoformat()
-                if date_str not in next_collections:
-                    next_collections[date_str] = []
-                next_collections[date_str].append(self.coordinator.min_renovasjon.get_fraction_name(fraction_id))
-
-            if not next_collections:
-                return "Unavailable"
-
-            # Get the earliest date
-            earliest_date = min(next_collections.keys())
-            fractions = next_collections[earliest_date]
-            return " og ".join(fractions)
-
-        except Exception as e:
-            _LOGGER.exception("Error getting state for next collection sensor: %s", e)
-            return "Unavailable"
+        return self.coordinator.next_collection_view.state
 
     @property
     def extra_state_attributes(self) -> dict[str, str | int]:
-        attributes = {}
-        try:
-            next_date = None
-            for fraction_id in self.coordinator.fractions:
-                fraction_data = self.coordinator.data.get(fraction_id)
-                if not fraction_data or len(fraction_data) <= 3 or not fraction_data[3]:
-                    continue
-                    
-                collection_date = fraction_data[3]
-                if not isinstance(collection_date, datetime):
-                    continue
-                    
-                if next_date is None or collection_date < next_date:
-                    next_date = collection_date
-
-            if next_date:
-                days_until = (next_date.date() - datetime.now().date()).days
-                attributes["days_until"] = max(0, days_until)
-                attributes["next_collection_date"] = next_date.strftime("%d/%m/%Y")
-
-        except Exception as e:
-            _LOGGER.error("Error getting extra state attributes for next collection sensor: %s", e)
-
+        attributes = self.coordinator.next_collection_view.attributes
+        if self.coordinator.refresh_scheduler is not None:
+            attributes = {**attributes, **self.coordinator.refresh_scheduler.as_dict()}
+        if self.coordinator.stale:
+            attributes = {**attributes, **self.coordinator.stale_attributes}
         return attributes
 
-class MinRenovasjonSensor(CoordinatorEntity, SensorEntity):
+class MinRenovasjonSensor(MinRenovasjonEntity, SensorEntity):
+    _unrecorded_attributes = frozenset({"days_until"})
 
     def __init__(self, coordinator: MinRenovasjonCoordinator, fraction_id: str) -> None:
         super().__init__(coordinator)
         self._fraction_id = fraction_id
-        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{fraction_id}"
-        self._attr_name = f"Min Renovasjon {coordinator.min_renovasjon.get_fraction_name(fraction_id)}"
+        self._attr_unique_id = f"{coordinator.unique_id_prefix}_{fraction_id}"
+        self._attr_name = f"{coordinator.entity_name_prefix} {coordinator.min_renovasjon.get_fraction_name(fraction_id)}"
         _LOGGER.debug("Initialized sensor for fraction %s with name %s", fraction_id, self._attr_name)
 
+    def _has_changed(self) -> bool:
+        return self._fraction_id in self.coordinator.changed_views
+
+    @property
+    def _view(self) -> SensorView:
+        return self.coordinator.sensor_views.get(self._fraction_id, MISSING_VIEW)
+
     @property
     def state(self) -> str:
-        _LOGGER.debug("Getting state for fraction %s", self._fraction_id)
-        _LOGGER.debug("Coordinator data: %s", self.coordinator.data)
-        
-        try:
-            fraction_data = self.coordinator.data.get(self._fraction_id)
-            _LOGGER.debug("Fraction data for %s: %s", self._fraction_id, fraction_data)
-            
-            if fraction_data and len(fraction_data) > 3 and fraction_data[3]:
-                state = self.coordinator.min_renovasjon.format_date(fraction_data[3])
-                _LOGGER.debug("Formatted state for fraction %s: %s", self._fraction_id, state)
-                return state
-            else:
-                _LOGGER.warning("Invalid or missing data for fraction %s", self._fraction_id)
-        except Exception as e:
-            _LOGGER.exception("Error getting state for fraction %s: %s", self._fraction_id, e)
-        
-        return "Unknown"
+        return self._view.state
 
     @property
     def entity_picture(self) -> str | None:
-        try:
-            fraction_data = self.coordinator.data.get(self._fraction_id)
-            if fraction_data and len(fraction_data) > 2:
-                url = fraction_data[2]
-                if url and url.startswith('http://'):
-                    return url.replace('http://', 'https://', 1)
-                return url
-        except Exception as e:
-            _LOGGER.error("Error getting entity picture for fraction %s: %s", self._fraction_id, e)
-        return None
+        return self._view.entity_picture
 
     @property
     def extra_state_attributes(self) -> dict[str, str]:
-        attributes = {}
-        try:
-            fraction_data = self.coordinator.data.get(self._fraction_id)
-            if fraction_data:
-                if len(fraction_data) > 4 and fraction_data[4]:
-                    attributes["next_collection"] = self.coordinator.min_renovasjon.format_date(fraction_data[4])
-                if len(fraction_data) > 3 and fraction_data[3]:
-                    next_date = fraction_data[3]
-                    if isinstance(next_date, datetime):
-                        days_until = (next_date.date() - datetime.now().date()).days
-                        attributes["days_until"] = max(0, days_until)
-                attributes["fraction_name"] = self.coordinator.min_renovasjon.get_fraction_name(self._fraction_id)
-            _LOGGER.debug("Extra state attributes for fraction %s: %s", self._fraction_id, attributes)
-        except Exception as e:
-            _LOGGER.error("Error getting extra state attributes for fraction %s: %s", self._fraction_id, e)
-        return attributes
+        if self.coordinator.stale:
+            return {**self._view.attributes, **self.coordinator.stale_attributes}
+        return self._view.attributes
+
+
+@dataclass(frozen=True, kw_only=True)
+class MinRenovasjonMetricDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor reading a runtime metric."""
+
+    value_fn: Callable[[MinRenovasjonCoordinator], float | int | datetime | None]
+
+
+METRIC_SENSORS: tuple[MinRenovasjonMetricDescription, ...] = (
+    MinRenovasjonMetricDescription(
+        key="update_duration",
+        name="Update Duration",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.update_duration.last
+        if coordinator.update_duration.count
+        else None,
+    ),
+    MinRenovasjonMetricDescription(
+        key="last_success",
+        name="Last Successful Update",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda coordinator: coordinator.data_fetched,
+    ),
+    MinRenovasjonMetricDescription(
+        key="api_latency_p95",
+        name="API Latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.min_renovasjon.metrics.latency_p95,
+    ),
+    MinRenovasjonMetricDescription(
+        key="api_retries",
+        name="API Retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.min_renovasjon.metrics.retries,
+    ),
+)
+
+
+class MinRenovasjonMetricSensor(MinRenovasjonEntity, SensorEntity):
+    """Diagnostic sensor for a runtime metric, disabled until a user enables it."""
+
+    entity_description: MinRenovasjonMetricDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: MinRenovasjonCoordinator,
+        description: MinRenovasjonMetricDescription,
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.unique_id_prefix}_metric_{description.key}"
+        self._attr_name = f"{coordinator.entity_name_prefix} {description.name}"
+
+    def _has_changed(self) -> bool:
+        # Metrics move on every update, whether or not the schedule did
+        return True
+
+    @property
+    def available(self) -> bool:
+        # Metrics matter most while updates are failing
+        return True
+
+    @property
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self.coordinator)
+
+
+def _new_fraction_listener(
+    coordinator: MinRenovasjonCoordinator,
+    known: set[str],
+    async_add_entities: AddEntitiesCallback,
+) -> Callable[[], None]:
+    @callback
+    def _async_add_new_fractions() -> None:
+        if new := [fraction_id for fraction_id in coordinator.fractions if fraction_id not in known]:
+            known.update(new)
+            async_add_entities(
+                MinRenovasjonSensor(coordinator, fraction_id) for fraction_id in new
+            )
+
+    return _async_add_new_fractions
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -145,12 +196,29 @@ async def async_setup_entry(
 ) -> None:
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
     
-    if not isinstance(coordinator, MinRenovasjonCoordinator):
+    if not isinstance(coordinator, (MinRenovasjonCoordinator, MinRenovasjonBatchCoordinator)):
         raise TypeError("Coordinator is not of type MinRenovasjonCoordinator")
     
-    _LOGGER.debug("Setting up sensors for fractions: %s", coordinator.fractions)
-    
-    entities = [MinRenovasjonSensor(coordinator, fraction_id) for fraction_id in coordinator.fractions]
-    entities.append(MinRenovasjonNextCollectionSensor(coordinator))
+    entities = []
+    for address_coordinator in coordinator.address_coordinators:
+        _LOGGER.debug("Setting up sensors for fractions: %s", address_coordinator.fractions)
+        entities.extend(
+            MinRenovasjonSensor(address_coordinator, fraction_id)
+            for fraction_id in address_coordinator.fractions
+        )
+        # A batch address whose first refresh failed has no fractions yet, and
+        # a municipality can add fractions later; add their sensors as they appear
+        config_entry.async_on_unload(
+            address_coordinator.async_add_listener(
+                _new_fraction_listener(
+                    address_coordinator, set(address_coordinator.fractions), async_add_entities
+                )
+            )
+        )
+        entities.append(MinRenovasjonNextCollectionSensor(address_coordinator))
+        entities.extend(
+            MinRenovasjonMetricSensor(address_coordinator, description)
+            for description in METRIC_SENSORS
+        )
     
     async_add_entities(entities)
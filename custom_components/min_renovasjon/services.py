@@ -0,0 +1,214 @@
+"""Services for Min Renovasjon."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_ENABLED,
+    ATTR_END,
+    ATTR_PROFILE_SECONDS,
+    ATTR_SAMPLE_RATE,
+    ATTR_START,
+    DEFAULT_SCHEDULE_DAYS,
+    DEFAULT_STATISTICS_DAYS,
+    MAX_PROFILE_SECONDS,
+    SERVICE_GET_SCHEDULE,
+    SERVICE_GET_STATISTICS,
+    SERVICE_SET_TRACING,
+)
+from .coordinator import MinRenovasjonBatchCoordinator, MinRenovasjonCoordinator
+
+DATA_PROFILING = f"{DOMAIN}_profiling"
+
+GET_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_START): cv.date,
+        vol.Optional(ATTR_END): cv.date,
+    }
+)
+
+GET_STATISTICS_SCHEMA = GET_SCHEDULE_SCHEMA
+
+SET_TRACING_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_ENABLED): cv.boolean,
+        vol.Optional(ATTR_SAMPLE_RATE, default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0.01, max=1.0)
+        ),
+        vol.Optional(ATTR_PROFILE_SECONDS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_PROFILE_SECONDS)
+        ),
+    }
+)
+
+
+def _statistics(coordinator: MinRenovasjonCoordinator, start: date, end: date) -> dict[str, Any]:
+    history = coordinator.history
+    return {
+        "address": coordinator.address_name,
+        "fractions": history.statistics(start, end) if history is not None else [],
+    }
+
+
+@callback
+def _loaded_entry(
+    hass: HomeAssistant, entry_id: str
+) -> tuple[ConfigEntry, MinRenovasjonCoordinator | MinRenovasjonBatchCoordinator]:
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(f"Unknown Min Renovasjon entry: {entry_id}")
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"Entry is not loaded: {entry.title}")
+    return entry, hass.data[DOMAIN][entry_id]
+
+
+async def _async_profile(hass: HomeAssistant, seconds: int) -> str:
+    """Profile the event loop for `seconds` and write the stats to the config dir."""
+    # Only this opt-in debugging aid profiles, so setup never loads this
+    import cProfile
+
+    if hass.data.get(DATA_PROFILING):
+        raise ServiceValidationError("A profile is already being recorded")
+    hass.data[DATA_PROFILING] = True
+    path = hass.config.path(f"{DOMAIN}_profile.{int(time.time())}.cprof")
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        await asyncio.sleep(seconds)
+        profiler.disable()
+        await hass.async_add_executor_job(profiler.dump_stats, path)
+    finally:
+        profiler.disable()
+        hass.data[DATA_PROFILING] = False
+    return path
+
+
+def _pickups(coordinator: MinRenovasjonCoordinator, start: date, end: date) -> dict[str, Any]:
+    timeline = coordinator.timeline
+    return {
+        "address": coordinator.address_name,
+        "stale": coordinator.stale,
+        "data_fetched": (
+            coordinator.data_fetched.isoformat() if coordinator.data_fetched else None
+        ),
+        "pickups": [
+            {
+                "date": timeline[index].day.isoformat(),
+                "fraction_id": timeline[index].fraction_id,
+                "fraction_name": timeline[index].fraction_name,
+            }
+            for index in timeline.index_range(start, end)
+        ],
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services, once for all entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_GET_SCHEDULE):
+        return
+
+    async def _async_get_schedule(call: ServiceCall) -> ServiceResponse:
+        """Return the cached pickups of one or more entries; never calls the API."""
+        start: date = call.data.get(ATTR_START) or dt_util.now().date()
+        end: date = call.data.get(ATTR_END) or start + timedelta(days=DEFAULT_SCHEDULE_DAYS)
+        if end < start:
+            raise ServiceValidationError("The end date must not be before the start date")
+
+        entries: dict[str, Any] = {}
+        for entry_id in call.data[ATTR_CONFIG_ENTRY_ID]:
+            entry, coordinator = _loaded_entry(hass, entry_id)
+            entries[entry_id] = {
+                "title": entry.title,
+                "addresses": [
+                    _pickups(address_coordinator, start, end)
+                    for address_coordinator in coordinator.address_coordinators
+                ],
+            }
+
+        return {"start": start.isoformat(), "end": end.isoformat(), "entries": entries}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SCHEDULE,
+        _async_get_schedule,
+        schema=GET_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _async_get_statistics(call: ServiceCall) -> ServiceResponse:
+        """Summarise the recorded pickup history of one or more entries."""
+        end: date = call.data.get(ATTR_END) or dt_util.now().date()
+        start: date = call.data.get(ATTR_START) or end - timedelta(days=DEFAULT_STATISTICS_DAYS)
+        if end < start:
+            raise ServiceValidationError("The end date must not be before the start date")
+
+        entries: dict[str, Any] = {}
+        for entry_id in call.data[ATTR_CONFIG_ENTRY_ID]:
+            entry, coordinator = _loaded_entry(hass, entry_id)
+            entries[entry_id] = {
+                "title": entry.title,
+                "addresses": [
+                    _statistics(address_coordinator, start, end)
+                    for address_coordinator in coordinator.address_coordinators
+                ],
+            }
+
+        return {"start": start.isoformat(), "end": end.isoformat(), "entries": entries}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_STATISTICS,
+        _async_get_statistics,
+        schema=GET_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _async_set_tracing(call: ServiceCall) -> ServiceResponse:
+        """Switch tracing of one or more entries, optionally recording a profile."""
+        tracers = [
+            _loaded_entry(hass, entry_id)[1].tracer
+            for entry_id in call.data[ATTR_CONFIG_ENTRY_ID]
+        ]
+        for tracer in tracers:
+            tracer.configure(call.data[ATTR_ENABLED], call.data[ATTR_SAMPLE_RATE])
+
+        profile = None
+        if seconds := call.data.get(ATTR_PROFILE_SECONDS):
+            profile = await _async_profile(hass, seconds)
+
+        if not call.return_response:
+            return None
+        return {
+            "profile": profile,
+            "entries": {tracer.name: tracer.as_dict() for tracer in tracers},
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_TRACING,
+        _async_set_tracing,
+        schema=SET_TRACING_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
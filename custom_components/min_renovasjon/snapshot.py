@@ -0,0 +1,163 @@
+"""Persistent snapshot of the last good calendar for Min Renovasjon."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime, time, timedelta
+import logging
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, CONF_COUNTY_ID, CONF_HOUSE_NO, CONF_STREET_CODE
+from .min_renovasjon import FractionCalendar, MinRenovasjon
+from .recurrence import Recurrence, infer_recurrence
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 2
+SAVE_DELAY = 10
+
+DATA_SEEDS = f"{DOMAIN}_seeds"
+# How long a config flow's validation result stays usable by setup
+SEED_TTL = timedelta(minutes=5)
+
+
+def address_key(address: Mapping[str, Any]) -> str:
+    """Return a stable key for one address of a config entry."""
+    return f"{address[CONF_COUNTY_ID]}_{address[CONF_STREET_CODE]}_{address[CONF_HOUSE_NO]}"
+
+
+class CalendarSeed(NamedTuple):
+    """A catalogue and calendar fetched while validating a config flow."""
+
+    fraction_types: dict[int, dict[str, Any]]
+    calendar_list: list[FractionCalendar]
+    fetched: datetime
+
+
+@callback
+def async_store_seed(hass: HomeAssistant, key: str, api: MinRenovasjon) -> None:
+    """Keep a freshly validated calendar for the entry about to be set up."""
+    seeds: dict[str, CalendarSeed] = hass.data.setdefault(DATA_SEEDS, {})
+    now = dt_util.utcnow()
+    for expired in [key for key, seed in seeds.items() if now - seed.fetched > SEED_TTL]:
+        del seeds[expired]
+    seeds[key] = CalendarSeed(dict(api.fraction_types), api.calender_list, now)
+
+
+@callback
+def async_pop_seed(hass: HomeAssistant, key: str) -> CalendarSeed | None:
+    """Take the seed stored for an address, unless it has expired."""
+    seed: CalendarSeed | None = hass.data.get(DATA_SEEDS, {}).pop(key, None)
+    if seed is None or dt_util.utcnow() - seed.fetched > SEED_TTL:
+        return None
+    return seed
+
+
+def _dump_pickups(entry: FractionCalendar) -> list[str] | dict[str, Any]:
+    """Store a regular schedule as its rule and exceptions instead of every date."""
+    recurrence = entry.recurrence
+    if (
+        recurrence is not None
+        and all(pickup.time() == time.min for pickup in entry.pickup_dates)
+        and len(entry.pickup_dates) == len(set(entry.pickup_dates))
+    ):
+        return recurrence.as_dict()
+    return [pickup.isoformat() for pickup in entry.pickup_dates]
+
+
+def _load_pickups(
+    pickups: list[str] | dict[str, Any],
+) -> tuple[tuple[datetime, ...], Recurrence | None]:
+    if isinstance(pickups, dict):
+        recurrence = Recurrence.from_dict(pickups)
+        return (
+            tuple(datetime.combine(day, time.min) for day in recurrence.observed()),
+            recurrence,
+        )
+    # Snapshots written before schedules were compressed
+    pickup_dates = tuple(datetime.fromisoformat(pickup) for pickup in pickups)
+    return pickup_dates, infer_recurrence(sorted({pickup.date() for pickup in pickup_dates}))
+
+
+class _SnapshotStore(Store[dict[str, Any]]):
+    """Store that upgrades snapshots written by older versions."""
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        if old_major_version != 1:
+            raise ValueError(f"Unsupported calendar snapshot version {old_major_version}")
+        # Version 1 rows held only the next two pickups, each possibly None.
+        # They restore as a short calendar until the first refresh.
+        _LOGGER.debug("Migrating calendar snapshot from version 1")
+        return {
+            **old_data,
+            "calendar": [
+                [fraction_id, name, icon, [pickup for pickup in (first, second) if pickup]]
+                for fraction_id, name, icon, first, second in old_data["calendar"]
+            ],
+        }
+
+
+class CalendarSnapshotStore:
+    """Store the fraction catalogue and parsed calendar of one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store = _SnapshotStore(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+    async def async_restore(self, api: MinRenovasjon) -> datetime | None:
+        """Load the snapshot into the API client, returning when it was saved."""
+        try:
+            data = await self._store.async_load()
+            if not data or data.get("kommunenr") != api.kommunenr:
+                return None
+
+            fraction_types = {fraction["Id"]: fraction for fraction in data["fractions"]}
+            calendar_list = [
+                FractionCalendar(fraction_id, name, icon, *_load_pickups(pickups))
+                for fraction_id, name, icon, pickups in data["calendar"]
+            ]
+            saved = datetime.fromisoformat(data["saved"])
+            if saved.tzinfo is None:
+                saved = saved.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        except Exception as err:  # A corrupt or outdated snapshot must never block setup
+            _LOGGER.warning("Ignoring unreadable calendar snapshot: %s", err)
+            return None
+
+        if fetched_at := data.get("fractions_fetched"):
+            api.catalogue.seed(api.kommunenr, fraction_types, datetime.fromisoformat(fetched_at))
+        api.restore(fraction_types, calendar_list)
+        _LOGGER.debug(
+            "Restored %d calendar entries saved at %s", len(calendar_list), saved
+        )
+        return saved
+
+    @callback
+    def async_save(self, api: MinRenovasjon) -> None:
+        """Schedule a write of the client's current catalogue and calendar."""
+        self._store.async_delay_save(lambda: self._serialize(api), SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    @staticmethod
+    def _serialize(api: MinRenovasjon) -> dict[str, Any]:
+        fetched_at = api.catalogue.fetched_at(api.kommunenr)
+        return {
+            "kommunenr": api.kommunenr,
+            "saved": dt_util.now().isoformat(),
+            "fractions_fetched": fetched_at.isoformat() if fetched_at else None,
+            "fractions": list(api.fraction_types.values()),
+            "calendar": [
+                [
+                    entry.fraction_id,
+                    entry.name,
+                    entry.icon,
+                    _dump_pickups(entry),
+                ]
+                for entry in api.calender_list
+            ],
+        }
@@ -0,0 +1,156 @@
+"""Opt-in, sampled tracing spans for the Min Renovasjon hot paths."""
+from __future__ import annotations
+
+from collections import deque
+from contextvars import ContextVar
+from itertools import count
+import logging
+import random
+import time
+from typing import Any
+
+# Spans go to their own logger, so they can be enabled without debug logging
+# for the rest of the integration
+TRACE_LOGGER = logging.getLogger(f"{__package__}.trace")
+
+# Finished spans kept per tracer for the service response and diagnostics
+MAX_SPANS = 200
+
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar("min_renovasjon_span", default=None)
+_TRACE_IDS = count(1)
+
+
+class _NoopSpan:
+    """Returned by a disabled tracer; entering and leaving it does nothing."""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def set(self, **attributes: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """One timed operation, recorded only when its trace was sampled.
+
+    Spans are falsy when they will not be recorded, so callers can skip
+    building attributes with `if span: span.set(...)`.
+    """
+
+    __slots__ = (
+        "_tracer",
+        "_token",
+        "name",
+        "trace_id",
+        "parent",
+        "sampled",
+        "attributes",
+        "started",
+        "duration",
+        "error",
+    )
+
+    def __init__(self, tracer: Tracer, name: str, parent: Span | None) -> None:
+        self._tracer = tracer
+        self._token = None
+        self.name = name
+        self.parent = parent.name if parent is not None else None
+        if parent is None:
+            # The sampling decision is made once per trace, so traces stay whole
+            self.trace_id = next(_TRACE_IDS)
+            self.sampled = random.random() < tracer.sample_rate
+        else:
+            self.trace_id = parent.trace_id
+            self.sampled = parent.sampled
+        self.attributes: dict[str, Any] = {}
+        self.started = 0.0
+        self.duration = 0.0
+        self.error: str | None = None
+
+    def __bool__(self) -> bool:
+        return self.sampled
+
+    def __enter__(self) -> Span:
+        self._token = _CURRENT_SPAN.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, *exc_info: Any) -> None:
+        self.duration = time.perf_counter() - self.started
+        _CURRENT_SPAN.reset(self._token)
+        if self.sampled:
+            if exc_type is not None:
+                self.error = exc_type.__name__
+            self._tracer.record(self)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "parent": self.parent,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """Spans of one config entry, switched on and off at runtime.
+
+    While disabled, `span` returns a shared no-op span, so traced code does
+    no timing, sampling or formatting work.
+    """
+
+    __slots__ = ("name", "enabled", "sample_rate", "spans")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.spans: deque[Span] = deque(maxlen=MAX_SPANS)
+
+    def configure(self, enabled: bool, sample_rate: float = 1.0) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        if not enabled:
+            self.spans.clear()
+
+    def span(self, name: str) -> Span | _NoopSpan:
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, _CURRENT_SPAN.get())
+
+    def record(self, span: Span) -> None:
+        self.spans.append(span)
+        if TRACE_LOGGER.isEnabledFor(logging.DEBUG):
+            TRACE_LOGGER.debug(
+                "entry=%s trace=%d span=%s parent=%s duration_ms=%.3f error=%s %s",
+                self.name,
+                span.trace_id,
+                span.name,
+                span.parent,
+                span.duration * 1000,
+                span.error,
+                " ".join(f"{key}={value}" for key, value in span.attributes.items()),
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "spans": [span.as_dict() for span in self.spans],
+        }
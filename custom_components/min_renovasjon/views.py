@@ -0,0 +1,82 @@
+"""Sensor state precomputed once per coordinator refresh and at local midnight."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any
+
+from .min_renovasjon import FractionCalendar, MinRenovasjon
+
+STATE_UNKNOWN = "Unknown"
+STATE_UNAVAILABLE = "Unavailable"
+
+
+@dataclass(frozen=True, slots=True)
+class SensorView:
+    """State, attributes and picture of one sensor."""
+
+    state: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    entity_picture: str | None = None
+
+
+def build_fraction_view(
+    api: MinRenovasjon,
+    entry: FractionCalendar | None,
+    today: date,
+    icon_urls: Mapping[str, str] | None = None,
+) -> SensorView:
+    """Build the view of a single fraction sensor.
+
+    `icon_urls` maps remote icon URLs to locally served copies.
+    """
+    if entry is None:
+        return SensorView(STATE_UNKNOWN)
+
+    upcoming = entry.upcoming(today)
+    attributes: dict[str, Any] = {}
+    if len(upcoming) > 1:
+        attributes["next_collection"] = api.format_date(upcoming[1])
+    if upcoming:
+        attributes["days_until"] = (upcoming[0].date() - today).days
+    attributes["fraction_name"] = entry.name
+
+    picture = entry.icon or None
+    if picture and icon_urls and picture in icon_urls:
+        picture = icon_urls[picture]
+    elif picture and picture.startswith("http://"):
+        picture = picture.replace("http://", "https://", 1)
+
+    return SensorView(
+        api.format_date(upcoming[0]) if upcoming else STATE_UNKNOWN,
+        attributes,
+        picture,
+    )
+
+
+def build_next_collection_view(entries: Iterable[FractionCalendar], today: date) -> SensorView:
+    """Build the view of the sensor aggregating the earliest collection."""
+    next_date = None
+    fractions: list[str] = []
+    for entry in entries:
+        if not (upcoming := entry.upcoming(today)):
+            continue
+        next_pickup = upcoming[0]
+        if next_date is None or next_pickup.date() < next_date.date():
+            next_date = next_pickup
+            fractions = [entry.name]
+        elif next_pickup.date() == next_date.date():
+            fractions.append(entry.name)
+            next_date = min(next_date, next_pickup)
+
+    if next_date is None:
+        return SensorView(STATE_UNAVAILABLE)
+
+    return SensorView(
+        " og ".join(fractions),
+        {
+            "days_until": (next_date.date() - today).days,
+            "next_collection_date": next_date.strftime("%d/%m/%Y"),
+        },
+    )
@@ -0,0 +1,32 @@
+"""Import the integration's modules without running its Home Assistant setup.
+
+Shared by the benchmarks and the command-line tools, which run from the
+repository root.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+import importlib
+from pathlib import Path
+import sys
+import types
+
+PACKAGE_DIR = Path(__file__).resolve().parent / "custom_components" / "min_renovasjon"
+
+
+def loader(package: str) -> Callable[[str], types.ModuleType]:
+    """Return a function importing modules of the integration as `package`.
+
+    The package's `__init__` imports Home Assistant, so it is replaced by an
+    empty namespace. Modules that only need aiohttp import without Home
+    Assistant installed; the rest raise ImportError as usual.
+    """
+
+    def load(module: str) -> types.ModuleType:
+        if package not in sys.modules:
+            namespace = types.ModuleType(package)
+            namespace.__path__ = [str(PACKAGE_DIR)]
+            sys.modules[package] = namespace
+        return importlib.import_module(f"{package}.{module}")
+
+    return load